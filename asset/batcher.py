@@ -1,11 +1,31 @@
+import math
+import os
 import simplejson as json
 from common.logger import Logger
-from common.sqlanywhere import db_exec
-from common.util import hashify, hostname
-from typing import List
+from common.sqlanywhere import db_exec, db_stream
+from common.util import hashify, worker_pool
+from datetime import date, datetime
+from decimal import Decimal
+from dotenv import load_dotenv
+from typing import List, Optional
 
+load_dotenv()
 logger = Logger(__name__)
 
+# set BATCHER_KEYSET=false in .env to always use TOP/START AT batches
+BATCHER_KEYSET = os.environ.get("BATCHER_KEYSET", "true").lower() != "false"
+
+# target memory (raw rows + composed docs) per loader task
+LOADER_MEMORY_BUDGET_MB = int(os.environ.get("LOADER_MEMORY_BUDGET_MB") or 256)
+MIN_CHUNK = 100
+MAX_CHUNK = 100000
+ROW_SAMPLE_SIZE = 50
+
+# composed docs (dicts, json) are several times the raw row width
+DOC_EXPANSION = 4
+# decoded blobs (lists of python floats/dicts) are much larger than raw bytes
+BLOB_EXPANSION = 8
+
 
 def batch_selector(args) -> List[str]:
     """
@@ -43,6 +63,195 @@ def batch_selector(args) -> List[str]:
     return batch
 
 
+def sql_literal(val) -> Optional[str]:
+    """
+    Render a key value as a SQLAnywhere literal for keyset predicates
+    :param val: A key value from the result set
+    :return: SQL literal, or None if the value can't be used as a range bound
+    """
+    if isinstance(val, bool) or val is None:
+        return None
+    if isinstance(val, (int, Decimal)):
+        return str(val)
+    if isinstance(val, float):
+        return repr(val) if math.isfinite(val) else None
+    if isinstance(val, str):
+        # SQLAnywhere also treats backslash as an escape inside string literals
+        return "'" + val.replace("\\", "\\\\").replace("'", "''") + "'"
+    if isinstance(val, datetime):
+        return f"'{val.isoformat(sep=' ')}'"
+    if isinstance(val, date):
+        return f"'{val.isoformat()}'"
+    return None
+
+
+def keyset_predicate(keys: List[str], bound: List[str], op: str) -> str:
+    """
+    Expand a row-value comparison, i.e. (k1, k2) > (v1, v2), since SQLAnywhere
+    doesn't compare row constructors:
+        (k1 > v1) OR (k1 = v1 AND k2 > v2)
+    :param keys: Key column names
+    :param bound: SQL literals for the boundary key (see sql_literal)
+    :param op: ">" (after the bound) or "<=" (up to and including the bound)
+    :return: SQL predicate
+    """
+    strict = ">" if op == ">" else "<"
+    terms = []
+    for i, key in enumerate(keys):
+        equals = [f"{k} = {v}" for k, v in zip(keys[:i], bound[:i])]
+        terms.append(" AND ".join(equals + [f"{key} {strict} {bound[i]}"]))
+    if op == "<=":
+        terms.append(" AND ".join([f"{k} = {v}" for k, v in zip(keys, bound)]))
+    return "(" + " OR ".join(f"({t})" for t in terms) + ")"
+
+
+def batch_keyset_selector(args) -> List[str]:
+    """
+    Keyset alternative to batch_selector. Given the boundary keys (the last key
+    of each chunk but the final one), define a batch of SQL selects that use
+    range predicates instead of TOP/START AT, so SQLAnywhere doesn't sort and
+    skip x rows for every chunk.
+    Example  (keys: [uwi], boundaries: [['A']]):
+
+    "SELECT * FROM ( select ) purr_k WHERE 1=1 AND ((uwi < 'A') OR (uwi = 'A'))
+     ORDER BY uwi;",
+    "SELECT * FROM ( select ) purr_k WHERE 1=1 AND ((uwi > 'A')) ORDER BY uwi;"
+
+    :param args: a tuple containing the following parameters:
+        boundaries: list of boundary keys (lists of SQL literals)
+        keys: the asset_id_keys (key column names)
+        select: a SQL SELECT statement
+        where: a SQL WHERE clause (applied to the wrapped select)
+    :return: list of SQL select statements
+    """
+    boundaries, keys, select, where = args
+
+    order = f"ORDER BY {', '.join(keys)}"
+    lowers = [None] + boundaries
+    uppers = boundaries + [None]
+
+    batch = []
+    for lower, upper in zip(lowers, uppers):
+        preds = [where]
+        if lower is not None:
+            preds.append(keyset_predicate(keys, lower, ">"))
+        if upper is not None:
+            preds.append(keyset_predicate(keys, upper, "<="))
+        batch.append(
+            f"SELECT * FROM ( {select} ) purr_k {' AND '.join(preds)} {order};"
+        )
+
+    return batch
+
+
+def keyset_boundaries(conn, keys, chunk, select, where) -> Optional[List[List[str]]]:
+    """
+    Scan the (narrow) key columns once, in key order, and keep the last key of
+    every chunk. Keys are grouped by the database, so keys that only differ in
+    ways its collation ignores (i.e. case) count as one key and can't produce
+    an empty or overlapping range. Keys that are null or not orderable (i.e.
+    blobs) mean we must fall back to batch_selector, since range predicates
+    would skip those rows.
+    :param conn: SQLAnywhere connection params
+    :param keys: the asset_id_keys (key column names)
+    :param chunk: number of rows per batch
+    :param select: a SQL SELECT statement
+    :param where: a SQL WHERE clause (applied to the wrapped select)
+    :return: list of boundary keys (as SQL literals) or None
+    """
+    if not keys:
+        return None
+
+    key_list = ", ".join(keys)
+    key_sql = (
+        f"SELECT {key_list}, COUNT(*) AS purr_rows FROM ( {select} ) purr_k "
+        f"{where} GROUP BY {key_list} ORDER BY {key_list}"
+    )
+
+    boundaries = []
+    rows = 0
+    final_cut = False
+    try:
+        for block in db_stream(conn, key_sql):
+            for row in block:
+                literals = [sql_literal(row[k]) for k in keys]
+                if None in literals:
+                    logger.warning(f"keys not orderable {keys}: {row}")
+                    return None
+                # each group is a distinct key, so it never spans two chunks
+                rows += row["purr_rows"]
+                final_cut = rows >= chunk
+                if final_cut:
+                    boundaries.append(literals)
+                    rows = 0
+    except Exception as error:
+        logger.warning(f"keyset scan failed, using TOP/START AT: {error}")
+        return None
+
+    # the final chunk is open-ended
+    if final_cut:
+        boundaries.pop()
+    return boundaries
+
+
+def value_bytes(val) -> int:
+    """
+    Rough in-memory footprint of a result value once it's in a doc
+    """
+    if val is None:
+        return 0
+    if isinstance(val, (bytes, bytearray, memoryview)):
+        # blobs usually decode to lists (curves, registration points)
+        return len(val) * BLOB_EXPANSION
+    if isinstance(val, str):
+        return len(val)
+    return 8
+
+
+def estimate_row_bytes(rows: List[dict]) -> Optional[float]:
+    """
+    Average (raw) row width of a sample of result rows
+    :param rows: A list of row dicts, i.e. from db_exec
+    :return: bytes per row or None if there are no rows
+    """
+    if not rows:
+        return None
+    total = sum(value_bytes(v) for row in rows for v in row.values())
+    return total / len(rows)
+
+
+def sample_row_bytes(conn, select, where) -> Optional[float]:
+    """
+    Pull a few rows to estimate bytes per row
+    :param conn: SQLAnywhere connection params
+    :param select: a SQL SELECT statement
+    :param where: a SQL WHERE clause (applied to the wrapped select)
+    :return: bytes per row or None
+    """
+    sample = f"SELECT TOP {ROW_SAMPLE_SIZE} * FROM ( {select} ) purr_s {where}"
+    try:
+        return estimate_row_bytes(db_exec(conn, sample))
+    except Exception as error:
+        logger.warning(f"could not sample row width: {error}")
+        return None
+
+
+def adaptive_chunk(row_bytes: Optional[float], default_chunk: int) -> int:
+    """
+    Choose a chunk size (rows per loader task) that keeps a loader's rows and
+    composed docs within LOADER_MEMORY_BUDGET_MB. Narrow assets (formation
+    tops) get big chunks, blob-heavy ones (curves, rasters) get small ones.
+    :param row_bytes: Estimated raw bytes per row
+    :param default_chunk: The dna default_chunk, used if there's no estimate
+    :return: number of rows per chunk
+    """
+    if not row_bytes:
+        return default_chunk
+    budget = LOADER_MEMORY_BUDGET_MB * 1024 * 1024
+    chunk = int(budget / (row_bytes * DOC_EXPANSION))
+    return max(MIN_CHUNK, min(MAX_CHUNK, chunk))
+
+
 def batcher(body, dna, repo) -> List[dict]:
     """
     Used in conjunction with a Supabase Edge function, this constructs SQL
@@ -88,17 +297,35 @@ def batcher(body, dna, repo) -> List[dict]:
         print(f"No {body.suite} {body.asset} records found in .")
         return []
     asset_count: int = res[0].get("count")
+    if not asset_count:
+        # as with batch_selector, no rows means no loader tasks
+        print(f"No {body.suite} {body.asset} records found in .")
+        return []
+
+    # chunk size: user-specified, or sized to the memory budget by the width
+    # of a sample of rows (measured here, since loaders may run on other hosts)
+    chunk = body.chunk
+    if not chunk:
+        row_bytes = sample_row_bytes(repo.conn, select, where)
+        chunk = adaptive_chunk(row_bytes, dna.get("default_chunk"))
+        logger.info(f"{body.asset} chunk: {chunk} (~{row_bytes or 0:.0f} bytes/row)")
 
-    # get batches
-    chunk = body.chunk or dna.get("default_chunk")
-    selectors = batch_selector((asset_count, chunk, select, order, where))
+    # get batches: keyset ranges if the asset keys allow it, else TOP/START AT
+    asset_id_keys = dna.get("asset_id_keys")
+    boundaries = None
+    if BATCHER_KEYSET:
+        boundaries = keyset_boundaries(repo.conn, asset_id_keys, chunk, select, where)
+    if boundaries is not None:
+        selectors = batch_keyset_selector((boundaries, asset_id_keys, select, where))
+    else:
+        selectors = batch_selector((asset_count, chunk, select, order, where))
 
     tasks = []
     for selector in selectors:
         task_body = {
             "asset": body.asset,
             "tag": body.tag,
-            "asset_id_keys": dna.get("asset_id_keys"),
+            "asset_id_keys": asset_id_keys,
             "batch_id": hashify(json.dumps(body.to_dict()).lower()),
             "conn": repo.conn.to_dict(),
             "suite": repo.suite,
@@ -113,7 +340,7 @@ def batcher(body, dna, repo) -> List[dict]:
         }
         tasks.append(
             {
-                "worker": hostname(),
+                "worker": worker_pool(),
                 "directive": "loader",
                 "status": "PENDING",
                 "body": task_body,
@@ -1,14 +1,28 @@
+import os
 import psycopg2
 import psycopg2.extras
 from common.logger import Logger
-from common.sqlanywhere import db_exec
-from common.util import hashify, local_pg_params
-from asset.xformer import xformer
-from typing import List
+from common.sqlanywhere import db_stream
+from common.pg_pool import pg_conn
+from common.util import hashify
+from asset.xformer import compile_xforms, XformStep
+from dotenv import load_dotenv
+from typing import Dict, List
 
+load_dotenv()
 logger = Logger(__name__)
 
 
+# set LOADER_COLUMNAR=false in .env to compose docs row by row
+LOADER_COLUMNAR = os.environ.get("LOADER_COLUMNAR", "true").lower() != "false"
+
+# set PG_BULK_UPSERT=false in .env to upsert one doc (round trip) at a time
+PG_BULK_UPSERT = os.environ.get("PG_BULK_UPSERT", "true").lower() != "false"
+PG_STAGE_PAGE_SIZE = 1000
+
+# rows fetched (and composed/upserted) at a time within a loader task
+LOADER_FETCH_SIZE = int(os.environ.get("LOADER_FETCH_SIZE") or 5000)
+
 ASSET_COLUMNS = ["id", "repo_id", "repo_name", "well_id", "suite", "tag", "doc"]
 
 
@@ -31,72 +45,144 @@ def make_upsert_stmt(table_name, columns) -> str:
     return " ".join(stmt)
 
 
-def pg_upserter(docs, table_name) -> None:
+def make_stage_stmts(table_name, columns) -> Dict[str, str]:
+    """
+    Construct the statements for a bulk "upsert" via a temp staging table. The
+    staging table is dropped on commit (or vanishes with a rollback).
+    :param table_name: The asset/table-name (they match)
+    :param columns: Usually just ASSET_COLUMNS
+    :return: dict of SQL strings: create, stage (for execute_values) and merge
+    """
+    stage_name = f"purr_stage_{table_name}"
+    col_list = ", ".join(columns)
+    return {
+        "create": (
+            f"CREATE TEMP TABLE {stage_name} ON COMMIT DROP AS "
+            f"SELECT {col_list} FROM {table_name} WITH NO DATA"
+        ),
+        "stage": f"INSERT INTO {stage_name} ({col_list}) VALUES %s",
+        "merge": (
+            f"INSERT INTO {table_name} ({col_list}) "
+            f"SELECT {col_list} FROM {stage_name} "
+            "ON CONFLICT (id) DO UPDATE SET "
+            + ", ".join([f"{col} = EXCLUDED.{col}" for col in columns[1:]])
+        ),
+    }
+
+
+def upsert_each(cursor, docs, table_name) -> int:
+    """
+    Original upsert scheme: one INSERT ... ON CONFLICT round trip per doc
+    :return: upsert count
+    """
+    upsert_stmt = make_upsert_stmt(table_name, ASSET_COLUMNS)
+
+    upsert_count = 0
+    cursor.execute("BEGIN")
+
+    for doc in docs:
+        ordered_data = [doc.get(col) for col in ASSET_COLUMNS]
+        cursor.execute(upsert_stmt, ordered_data)
+        upsert_count += cursor.rowcount
+
+    return upsert_count
+
+
+def upsert_bulk(cursor, docs, table_name) -> int:
+    """
+    Stream docs into a temp staging table in pages (execute_values) and merge
+    them into the asset table with a single INSERT ... SELECT ... ON CONFLICT.
+    Docs sharing an id are collapsed (last one wins, as with upsert_each) since
+    ON CONFLICT can't touch the same row twice in one statement. Collapsed
+    docs still count as upserted, so the count matches upsert_each.
+    :return: upsert count
+    """
+    stmts = make_stage_stmts(table_name, ASSET_COLUMNS)
+    unique_docs = list({doc.get("id"): doc for doc in docs}.values())
+
+    cursor.execute(stmts["create"])
+    psycopg2.extras.execute_values(
+        cursor,
+        stmts["stage"],
+        ([doc.get(col) for col in ASSET_COLUMNS] for doc in unique_docs),
+        page_size=PG_STAGE_PAGE_SIZE,
+    )
+    cursor.execute(stmts["merge"])
+    return cursor.rowcount + len(docs) - len(unique_docs)
+
+
+def pg_upserter(docs, table_name) -> int:
     """
     Upsert asset data to local PostgreSQL database. Each asset type has its own
     table, but the columns are identical.
+    Set PG_BULK_UPSERT=false in .env to upsert one doc at a time.
     :param docs: A list of dicts containing json documents
     :param table_name: A str of the asset/table name (they match)
-    :return: TODO
+    Errors are logged and re-raised (after the rollback), so a failed write
+    fails the loader task instead of passing for a load.
+    :return: upsert count
     """
-    conn = None
-    cursor = None
+    upsert_count = 0
     try:
-        conn = psycopg2.connect(**local_pg_params())
-        cursor = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
-        psycopg2.extensions.register_adapter(dict, psycopg2.extras.Json)
+        with pg_conn() as conn:
+            with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cursor:
+                psycopg2.extensions.register_adapter(dict, psycopg2.extras.Json)
+                if PG_BULK_UPSERT:
+                    upsert_count = upsert_bulk(cursor, docs, table_name)
+                else:
+                    upsert_count = upsert_each(cursor, docs, table_name)
 
-        upsert_stmt = make_upsert_stmt(table_name, ASSET_COLUMNS)
-
-        upsert_count = 0
-        cursor.execute("BEGIN")
-
-        for doc in docs:
-            ordered_data = [doc.get(col) for col in ASSET_COLUMNS]
-            cursor.execute(upsert_stmt, ordered_data)
-            upsert_count += cursor.rowcount
-
-        conn.commit()
+                conn.commit()
 
+        note = f"upsert: {upsert_count} of {len(docs)} {table_name}"
+        duplicates = len(docs) - len({doc.get("id") for doc in docs})
+        if duplicates:
+            note += f" ({duplicates} with repeated ids, merged)"
         logger.send_message(
             directive="note",
             # repo_id=repo.id,
-            data={"note": f"upsert: {upsert_count} of {len(docs)} {table_name}"},
+            data={"note": note},
             workflow="load",
         )
 
     except (Exception, psycopg2.Error) as error:
+        # pg_conn() rolls back the open transaction when the conn is returned
         logger.exception(error)
-        logger.exception("rolling back pg_upserter transaction after exception")
-        conn.rollback()
+        logger.exception("rolled back pg_upserter transaction after exception")
+        raise
 
-    finally:
-        if conn:
-            cursor.close()
-            conn.close()
+    return upsert_count
 
 
-def compose_docs(data, body) -> List[dict]:
+def compose_docs(data, body, plan: List[XformStep] = None) -> List[dict]:
     """
     A "document" (doc) is basically a json object defined for each specific
     asset by Supabase edge functions.
     :param data: Basically a list (result set) from SQLAnywhere
     :param body: The LoaderTask body, mostly used for metadata
+    :param plan: Compiled xforms (see compile_xforms), built here if omitted
     :return: List of docs
     """
     docs = []
 
-    for row in data:
+    if plan is None:
+        plan = compile_xforms(body.xforms, body.purr_delimiter, body.purr_null)
+
+    # some xforms decode a whole column in one call (ex: raster log sections)
+    decoded_columns = {
+        step.col: step.convert_column([row.get(step.col) for row in data])
+        for step in plan
+        if step.convert_column
+    }
+    row_steps = [(step.col, step.convert) for step in plan if not step.convert_column]
+
+    id_base = str(body.repo_id) + str(body.asset) + str(body.suite) + str(body.repo_id)
+
+    for i, row in enumerate(data):
         o = {}
         doc = {}
 
-        o["id"] = hashify(
-            str(body.repo_id)
-            + str(body.asset)
-            + str(body.suite)
-            + str(body.repo_id)
-            + "".join([str(row[k]) for k in body.asset_id_keys])
-        )
+        o["id"] = hashify(id_base + "".join([str(row[k]) for k in body.asset_id_keys]))
 
         o["well_id"] = "-".join([str(row[k]) for k in body.well_id_keys])
         o["repo_id"] = body.repo_id
@@ -104,22 +190,11 @@ def compose_docs(data, body) -> List[dict]:
         o["tag"] = body.tag
         o["suite"] = body.suite
 
-        # invoke xformer
-        for col, xf in body.xforms.items():
-            data_type = xf.get("ts_type")
-            func_name = xf.get("xform")
-            purr_delimiter = body.purr_delimiter
-            purr_null = body.purr_null
-            xform_args = (
-                func_name,
-                row,
-                col,
-                data_type,
-                None,
-                purr_delimiter,
-                purr_null,
-            )
-            row[col] = xformer(xform_args)
+        # apply compiled xforms
+        for col, values in decoded_columns.items():
+            row[col] = values[i]
+        for col, convert in row_steps:
+            row[col] = convert(row.get(col))
 
         # build json based on prefixes
         for prefix, table in body.prefixes.items():
@@ -136,35 +211,128 @@ def compose_docs(data, body) -> List[dict]:
     return docs
 
 
+def prefix_index(columns: List[str], prefixes: Dict[str, str]) -> Dict[str, list]:
+    """
+    Work out the prefix -> table split once from the column names. Same rules
+    as the row-wise compose_docs: a column lands in every table whose prefix it
+    starts with, and a repeated table name is replaced by the later prefix.
+    :param columns: Column names of the result set (after xforms)
+    :param prefixes: LoaderTaskBody.prefixes ({prefix: table})
+    :return: {table: [(doc_key, column_name), ...]}
+    """
+    index = {}
+    for prefix, table in prefixes.items():
+        index[table] = [
+            (col.replace(f"{prefix}", "", 1), col)
+            for col in columns
+            if col.startswith(prefix)
+        ]
+    return index
+
+
+def compose_column_docs(
+    columns: Dict[str, list], body, plan: List[XformStep] = None
+) -> List[dict]:
+    """
+    Columnar version of compose_docs. The result set is a dict of column arrays
+    (see db_stream(..., columnar=True)). Ids and xforms are computed per column
+    and the nested docs are assembled by zipping precomputed column groups.
+    :param columns: {column_name: [values]} from SQLAnywhere
+    :param body: The LoaderTask body, mostly used for metadata
+    :param plan: Compiled xforms (see compile_xforms), built here if omitted
+    :return: List of docs (same shape as compose_docs)
+    """
+    if plan is None:
+        plan = compile_xforms(body.xforms, body.purr_delimiter, body.purr_null)
+
+    num_rows = len(next(iter(columns.values()), []))
+    if num_rows == 0:
+        return []
+
+    # ids use the raw (pre-xform) values
+    id_base = str(body.repo_id) + str(body.asset) + str(body.suite) + str(body.repo_id)
+    asset_keys = zip(*[columns[k] for k in body.asset_id_keys])
+    ids = [hashify(id_base + "".join(map(str, keys))) for keys in asset_keys]
+    well_keys = zip(*[columns[k] for k in body.well_id_keys])
+    well_ids = ["-".join(map(str, keys)) for keys in well_keys]
+
+    # apply compiled xforms, one column at a time
+    for step in plan:
+        values = columns.get(step.col) or [None] * num_rows
+        if step.convert_column:
+            columns[step.col] = step.convert_column(values)
+        else:
+            columns[step.col] = list(map(step.convert, values))
+
+    # build json based on prefixes
+    tables = []
+    table_docs = []
+    for table, group in prefix_index(list(columns.keys()), body.prefixes).items():
+        keys = [doc_key for doc_key, _ in group]
+        if keys:
+            value_rows = zip(*[columns[col] for _, col in group])
+            table_docs.append([dict(zip(keys, vals)) for vals in value_rows])
+        else:
+            table_docs.append([{} for _ in range(num_rows)])
+        tables.append(table)
+
+    docs = []
+    for doc_id, well_id, *parts in zip(ids, well_ids, *table_docs):
+        docs.append(
+            {
+                "id": doc_id,
+                "well_id": well_id,
+                "repo_id": body.repo_id,
+                "repo_name": body.repo_name,
+                "tag": body.tag,
+                "suite": body.suite,
+                "doc": dict(zip(tables, parts)),
+            }
+        )
+    return docs
+
+
 def loader(body, repo):
     """
-    Main entry point for the loader/upserter
+    Main entry point for the loader/upserter. Errors (i.e. a source database
+    that stays unavailable, or a failed write to PostgreSQL) propagate so that the task handler doesn't clear
+    this task from the batch ledger as if it had loaded.
     :param body: An instance of LoaderTask
     :param repo: An instance of Repo
     :return: TODO
     """
 
-    try:
-
-        logger.send_message(
-            directive="note",
-            repo_id=repo.id,
-            data={"note": f"building {body.asset} loader query @ {repo.fs_path}"},
-            workflow="load",
-        )
+    logger.send_message(
+        directive="note",
+        repo_id=repo.id,
+        data={"note": f"building {body.asset} loader query @ {repo.fs_path}"},
+        workflow="load",
+    )
 
-        data = db_exec(repo.conn, body.selector)
-        docs = compose_docs(data, body)
+    plan = compile_xforms(body.xforms, body.purr_delimiter, body.purr_null)
 
-        logger.send_message(
-            directive="note",
-            repo_id=repo.id,
-            data={"note": f"composed {len(docs)} {body.asset} docs @ {repo.fs_path}"},
-            workflow="load",
-        )
+    # compose and upsert one fetchmany block at a time to bound memory
+    composed = 0
+    upserted = 0
+    blocks = db_stream(
+        repo.conn, body.selector, LOADER_FETCH_SIZE, columnar=LOADER_COLUMNAR
+    )
+    for block in blocks:
+        if LOADER_COLUMNAR:
+            docs = compose_column_docs(block, body, plan)
+        else:
+            docs = compose_docs(block, body, plan)
+        composed += len(docs)
 
         # print(json.dumps(docs, indent=2))
-        pg_upserter(docs, body.asset)
+        upserted += pg_upserter(docs, body.asset)
 
-    except Exception as error:
-        logger.exception(error)
+    logger.send_message(
+        directive="note",
+        repo_id=repo.id,
+        data={
+            "note": f"composed {composed}, upserted {upserted} {body.asset} "
+            f"docs @ {repo.fs_path}"
+        },
+        workflow="load",
+    )
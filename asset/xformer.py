@@ -1,76 +1,330 @@
 import re
 import math
-import struct
+import numpy as np
 from datetime import datetime
+from decimal import Decimal
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional
 
+CURVE_VALUES_OFFSET = 2
+
+# depth registration points: 28-byte records after a 12-byte header
+DEPTH_REG_OFFSET = 12
+DEPTH_REG_STRIDE = 28
+DEPTH_REG_DTYPE = np.dtype(
+    {
+        "names": ["depth", "pixel"],
+        "formats": ["<f8", "<i4"],
+        "offsets": [0, 12],
+        "itemsize": 16,
+    }
+)
+
+
+def decode_curve_array(blob, step: int = 1, null_value=None) -> np.ndarray:
+    """
+    Decode a GeoGraphix vector-log curve blob as a (zero-copy) float32 array.
+    The first two bytes are a header; the rest is packed little-endian floats.
+    Any trailing bytes that don't make a full float are ignored.
+    :param blob: The raw curve bytes from gx_well_curve
+    :param step: Keep every Nth sample (1 = no downsampling)
+    :param null_value: An optional sentinel (i.e. -999.25) to convert to NaN
+    :return: float32 numpy array (a read-only view unless nulls were replaced)
+    """
+    buf = memoryview(blob)[CURVE_VALUES_OFFSET:]
+    usable = len(buf) - len(buf) % 4
+    vals = np.frombuffer(buf[:usable], dtype="<f4")
+    if step > 1:
+        vals = vals[::step]
+    if null_value is not None:
+        nulls = vals == np.float32(null_value)
+        if nulls.any():
+            vals = np.where(nulls, np.float32(np.nan), vals)
+    return vals
+
+
+def decode_curve_values(blob, step: int = 1, null_value=None) -> list:
+    """
+    JSON-friendly curve values: NaN and null sentinels become None
+    :param blob: The raw curve bytes from gx_well_curve
+    :param step: Keep every Nth sample (1 = no downsampling)
+    :param null_value: An optional sentinel (i.e. -999.25) to convert to None
+    :return: list of floats (or None)
+    """
+    vals = decode_curve_array(blob, step, null_value)
+    nans = np.isnan(vals)
+    if not nans.any():
+        return vals.tolist()
+    out = vals.astype(object)
+    out[nans] = None
+    return out.tolist()
+
+
+def depth_registration_array(blob) -> np.ndarray:
+    """
+    View a raster log depth registration blob as a structured array of
+    (depth: double, pixel: int32) using a 28-byte stride. The last record only
+    needs the 16 bytes that hold depth and pixel.
+    :param blob: The raw registration bytes from log_image_reg_log_section
+    :return: structured numpy array with "depth" and "pixel" fields
+    """
+    buf = memoryview(blob)
+    count = len(buf) // DEPTH_REG_STRIDE if len(buf) >= DEPTH_REG_STRIDE else 0
+    if count == 0:
+        # too short for a record (numpy rejects the offset on a short buffer)
+        return np.empty(0, dtype=DEPTH_REG_DTYPE)
+    return np.ndarray(
+        shape=(count,),
+        dtype=DEPTH_REG_DTYPE,
+        buffer=buf,
+        offset=DEPTH_REG_OFFSET,
+        strides=(DEPTH_REG_STRIDE,),
+    )
+
+
+def reg_points(depths: list, pixels: list) -> List[dict]:
+    """
+    Pair up decoded depths and pixels as the registration dicts used in docs
+    """
+    return [{"depth": d, "pixel": p} for d, p in zip(depths, pixels)]
+
+
+def decode_depth_registration(blob) -> List[dict]:
+    """
+    Decode a raster log depth registration blob in one call
+    :param blob: The raw registration bytes from log_image_reg_log_section
+    :return: list of {"depth": float, "pixel": int} dicts
+    """
+    arr = depth_registration_array(blob)
+    return reg_points(arr["depth"].tolist(), arr["pixel"].tolist())
+
+
+def decode_depth_registration_column(blobs: list) -> List[Optional[List[dict]]]:
+    """
+    Decode the registration blobs for every row of a loader chunk at once. The
+    per-row views are concatenated so that conversion happens in a single pass.
+    :param blobs: A column of registration blobs (None is allowed)
+    :return: A list (per row) of registration point lists (or None)
+    """
+    arrays = [depth_registration_array(b) if b is not None else None for b in blobs]
+    present = [a for a in arrays if a is not None]
+    if not present:
+        return [None] * len(arrays)
+
+    merged = np.concatenate(present)
+    points = reg_points(merged["depth"].tolist(), merged["pixel"].tolist())
+
+    decoded = []
+    pos = 0
+    for a in arrays:
+        if a is None:
+            decoded.append(None)
+            continue
+        end = pos + len(a)
+        decoded.append(points[pos:end])
+        pos = end
+    return decoded
+
+
+# xforms that can decode a whole column (list of raw values) at once
+COLUMN_XFORMS = {
+    "decode_depth_registration": decode_depth_registration_column,
+}
+
+
+CONTROL_CHARS = re.compile(r"[\u0000-\u001F\u007F-\u009F]")
+
+KNOWN_TYPES = ("object", "string", "number", "date")
+
+NUMERIC_TYPES = (int, float, Decimal)
+
+
+def to_object(val):
+    print("UNEXPECTED OBJECT TYPE! (needs xformer)")
+    print(val)
+    return None
+
+
+def to_string(val) -> str:
+    return CONTROL_CHARS.sub("", str(val))
+
+
+def to_number(val) -> Optional[float]:
+    # numeric values from pyodbc can't be blank, so skip the str() test
+    if not isinstance(val, NUMERIC_TYPES) and str(val).replace(" ", "") == "":
+        return None
+    try:
+        n = float(val)
+        return n if not math.isnan(n) else None
+    except ValueError:
+        return None
 
-def xformer(xform_args):
-    func_name, row, col, data_type, arg, purr_delimiter, purr_null = xform_args
 
-    # purr_delimiter = "__purrDELIMITER__"
-    # purr_null = "__purrNULL__"
-
-    def ensure_type(dtype, val):
-        if val is None:
-            return None
-        elif dtype == "object":
-            print("UNEXPECTED OBJECT TYPE! (needs xformer)")
-            print(val)
-            return None
-        elif dtype == "string":
-            return re.sub(r"[\u0000-\u001F\u007F-\u009F]", "", str(val))
-        elif dtype == "number":
-            if str(val).replace(" ", "") == "":
-                return None
-            try:
-                n = float(val)
-                return n if not math.isnan(n) else None
-            except ValueError:
-                return None
-        elif dtype == "date":
-            try:
-                return datetime.fromisoformat(str(val)).isoformat()
-            except (ValueError, TypeError):
-                return None
-        else:
-            print(f"ENSURE TYPE SOMETHING ELSE (xformer): {type}")
-            return "XFORM ME"
-
-    if row.get(col) is None:
+def to_date(val) -> Optional[str]:
+    if type(val) is datetime:
+        return val.isoformat()
+    try:
+        return datetime.fromisoformat(str(val)).isoformat()
+    except (ValueError, TypeError):
         return None
 
-    ##################################################
+
+def to_unknown(val) -> str:
+    print(f"ENSURE TYPE SOMETHING ELSE (xformer): {type(val)}")
+    return "XFORM ME"
+
+
+TYPE_CONVERTERS = {
+    "object": to_object,
+    "string": to_string,
+    "number": to_number,
+    "date": to_date,
+}
+
+
+def ensure_type(dtype, val):
+    """
+    Coerce a (non-xformed) value to the expected ts_type
+    :param dtype: object, string, number or date
+    :param val: Any value from the SQLAnywhere result set
+    :return: the converted value or None
+    """
+    if val is None:
+        return None
+    return TYPE_CONVERTERS.get(dtype, to_unknown)(val)
+
+
+def curve_options(arg) -> tuple:
+    """
+    Read the optional dna "arg" of a decode_curve_values xform. It is either a
+    downsampling step (keep every Nth sample) or a dict with optional "step"
+    and "null" (a sentinel such as -999.25 to emit as None):
+        "arg": 4
+        "arg": {"step": 4, "null": -999.25}
+    No arg keeps every sample and leaves sentinels as they are.
+    :param arg: The xform arg from the dna (may be None)
+    :return: (step, null_value)
+    """
+    if arg is None or arg == "":
+        return 1, None
+
+    opts = arg if isinstance(arg, dict) else {"step": arg}
+    step = 1 if opts.get("step") is None else opts["step"]
+    null_value = opts.get("null")
+
+    try:
+        if isinstance(step, bool) or int(step) != float(step) or int(step) < 1:
+            raise ValueError
+        step = int(step)
+    except (TypeError, ValueError):
+        raise ValueError(
+            f"decode_curve_values step must be a positive integer, got: {step!r}"
+        )
+
+    if null_value is not None:
+        try:
+            null_value = float(null_value)
+        except (TypeError, ValueError):
+            raise ValueError(
+                f"decode_curve_values null must be a number, got: {null_value!r}"
+            )
+
+    return step, null_value
+
+
+def make_converter(
+    func_name, data_type, arg, purr_delimiter, purr_null
+) -> Callable[[Any], Any]:
+    """
+    Resolve a single xform definition into a callable that takes a raw value.
+    Everything that does not depend on the value is decided here, once.
+    :param func_name: The xform name from the dna (may be None)
+    :param data_type: The ts_type from the dna
+    :param arg: An optional xform argument from the dna
+    :param purr_delimiter: Delimiter used by delimited_array_with_nulls
+    :param purr_null: Null placeholder used by delimited_array_with_nulls
+    :return: A function of one value. None always converts to None.
+    """
+    ensure = TYPE_CONVERTERS.get(data_type, to_unknown)
 
     if func_name == "blob_to_hex":
-        return row[col].hex()
-
-    if func_name == "delimited_array_with_nulls":
-        values = row[col].split(purr_delimiter)
-        return [ensure_type(data_type, v) if v != purr_null else None for v in values]
-
-    if func_name == "decode_depth_registration":
-        reg_points = []
-        buf = bytearray(row[col])
-        for i in range(12, len(buf), 28):
-            depth_bytes = buf[i : i + 8]  # 64-bit float (double)
-            depth = struct.unpack("d", depth_bytes)[0]
-            pixel_bytes = buf[i + 12 : i + 16]  # 32-bit integer
-            pixel = struct.unpack("i", pixel_bytes)[0]
-            reg_points.append({"depth": depth, "pixel": pixel})
-        return reg_points
-
-    if func_name == "decode_curve_values":
-        curve_vals = []
-        buf = bytearray(row[col])
-        for i in range(2, len(buf), 4):
-            cval_bytes = buf[i : i + 4]  # 32 bit float
-            cval = struct.unpack("<f", cval_bytes)[0]
-            curve_vals.append(cval)
-        return curve_vals
+
+        def convert(val):
+            return val.hex()
+
+    elif func_name == "delimited_array_with_nulls":
+
+        def convert(val):
+            return [
+                ensure(v) if v != purr_null else None for v in val.split(purr_delimiter)
+            ]
+
+    elif func_name == "decode_depth_registration":
+        convert = decode_depth_registration
+
+    elif func_name == "decode_curve_values":
+        step, null_value = curve_options(arg)
+
+        def convert(val):
+            return decode_curve_values(val, step=step, null_value=null_value)
+
     else:
-        if data_type not in ("object", "string", "number", "date"):
+        if data_type not in KNOWN_TYPES:
             print("--------NEED TO ADD XFORM-------->", data_type)
-        return ensure_type(data_type, row[col])
+        convert = ensure
+
+    def converter(val):
+        return None if val is None else convert(val)
+
+    return converter
+
+
+@dataclass
+class XformStep:
+    col: str
+    convert: Callable[[Any], Any]
+    convert_column: Optional[Callable[[list], list]] = None
+
+
+def compile_xforms(xforms: dict, purr_delimiter, purr_null) -> List[XformStep]:
+    """
+    Build the "compiled plan" for a LoaderTaskBody's xforms: each column is
+    mapped to a pre-bound converter so that the per-row loop is just a list of
+    function calls. Build it once per loader task and reuse it for every row.
+    :param xforms: LoaderTaskBody.xforms ({col: {"xform", "ts_type", "arg"}})
+    :param purr_delimiter: LoaderTaskBody.purr_delimiter
+    :param purr_null: LoaderTaskBody.purr_null
+    :return: A list of XformStep
+    """
+    plan = []
+    for col, xf in xforms.items():
+        func_name = xf.get("xform")
+        plan.append(
+            XformStep(
+                col=col,
+                convert=make_converter(
+                    func_name,
+                    xf.get("ts_type"),
+                    xf.get("arg"),
+                    purr_delimiter,
+                    purr_null,
+                ),
+                convert_column=COLUMN_XFORMS.get(func_name),
+            )
+        )
+    return plan
+
+
+def xformer(xform_args):
+    """
+    Transform a single row/column value. This resolves the xform every call;
+    compose_docs uses compile_xforms instead.
+    :param xform_args: (func_name, row, col, data_type, arg, delimiter, null)
+    :return: The transformed value
+    """
+    func_name, row, col, data_type, arg, purr_delimiter, purr_null = xform_args
+    convert = make_converter(func_name, data_type, arg, purr_delimiter, purr_null)
+    return convert(row.get(col))
 
 
 def doc_post_processor():
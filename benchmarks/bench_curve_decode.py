@@ -0,0 +1,53 @@
+"""
+Curve decoding: the original per-sample struct loop vs decode_curve_values.
+
+run like this (from the repo root):
+python -m benchmarks.bench_curve_decode
+"""
+
+import struct
+import timeit
+import numpy as np
+from asset.xformer import decode_curve_values
+
+SAMPLES = 300_000
+RUNS = 10
+
+
+def struct_loop(blob) -> list:
+    """
+    The original decode_curve_values xform, one struct.unpack per sample
+    """
+    curve_vals = []
+    buf = bytearray(blob)
+    for i in range(2, len(buf), 4):
+        cval_bytes = buf[i : i + 4]  # 32 bit float
+        cval = struct.unpack("<f", cval_bytes)[0]
+        curve_vals.append(cval)
+    return curve_vals
+
+
+def make_blob(samples: int) -> bytes:
+    rng = np.random.default_rng(0)
+    vals = rng.normal(100, 25, samples).astype("<f4")
+    vals[::50] = -999.25
+    return b"\x00\x00" + vals.tobytes()
+
+
+def main():
+    blob = make_blob(SAMPLES)
+
+    assert struct_loop(blob) == decode_curve_values(blob)
+
+    for name, func in [
+        ("struct loop", lambda: struct_loop(blob)),
+        ("numpy", lambda: decode_curve_values(blob)),
+        ("numpy, step=4", lambda: decode_curve_values(blob, step=4)),
+        ("numpy, null=-999.25", lambda: decode_curve_values(blob, null_value=-999.25)),
+    ]:
+        secs = timeit.timeit(func, number=RUNS) / RUNS
+        print(f"{name:>20}: {secs * 1000:8.1f} ms per {SAMPLES} samples")
+
+
+if __name__ == "__main__":
+    main()
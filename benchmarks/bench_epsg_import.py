@@ -0,0 +1,56 @@
+"""
+recon.epsg import cost (python -X importtime, self time of recon.epsg) and the
+one-time load of epsg.json on the first epsg_indexes call.
+
+run like this (from the repo root):
+python -m benchmarks.bench_epsg_import
+"""
+
+import statistics
+import subprocess
+import sys
+import timeit
+import recon.epsg as epsg
+
+RUNS = 15
+
+
+def import_self_us() -> int:
+    """
+    Import recon.epsg in a fresh interpreter
+    :return: self time of the recon.epsg import, in microseconds
+    """
+    res = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import recon.epsg"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for line in res.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        fields = [f.strip() for f in line.split("|")]
+        if len(fields) == 3 and fields[2] == "recon.epsg":
+            return int(fields[0].split(":")[1])
+    raise RuntimeError(f"recon.epsg not in importtime output:\n{res.stderr}")
+
+
+def first_load() -> None:
+    epsg._epsg_indexes = None
+    epsg.epsg_indexes()
+
+
+def main():
+    import_self_us()  # make sure the .pyc files are written
+    imports = [import_self_us() / 1000 for _ in range(RUNS)]
+    loads = timeit.repeat(first_load, number=1, repeat=RUNS)
+
+    geodetics, projections = epsg.epsg_indexes()
+    print(f"recon.epsg import (self): {statistics.median(imports):.2f} ms median")
+    print(
+        f"first epsg_indexes call: {statistics.median(loads) * 1000:.2f} ms median "
+        f"({len(geodetics)} geodetics, {len(projections)} projections)"
+    )
+
+
+if __name__ == "__main__":
+    main()
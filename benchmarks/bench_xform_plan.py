@@ -0,0 +1,180 @@
+"""
+Loader doc composition on a synthetic 100k-row well chunk, in rows/second:
+
+- per-call: the original xformer for every column of every row, resolving
+  the xform (and redefining ensure_type) on each call, as compose_docs did
+  before compile_xforms
+- plan: compose_docs with a compiled xform plan
+- columnar: compose_column_docs with the same plan
+
+run like this (from the repo root):
+python -m benchmarks.bench_xform_plan
+"""
+
+import copy
+import math
+import re
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from asset.loader import compose_docs, compose_column_docs
+from asset.xformer import compile_xforms
+from common.util import hashify
+
+ROWS = 100_000
+
+XFORMS = {
+    "w_uwi": {"ts_type": "string"},
+    "w_well_name": {"ts_type": "string"},
+    "w_operator": {"ts_type": "string"},
+    "w_spud_date": {"ts_type": "date"},
+    "w_elevation": {"ts_type": "number"},
+    "w_total_depth": {"ts_type": "number"},
+    "w_latitude": {"ts_type": "number"},
+    "w_longitude": {"ts_type": "number"},
+    "w_aliases": {
+        "ts_type": "string",
+        "xform": "delimited_array_with_nulls",
+    },
+}
+
+BODY = SimpleNamespace(
+    asset="well",
+    asset_id_keys=["w_uwi"],
+    well_id_keys=["w_uwi"],
+    prefixes={"w_": "well"},
+    purr_delimiter="__purrDELIMITER__",
+    purr_null="__purrNULL__",
+    repo_id="bench",
+    repo_name="bench",
+    suite="geographix",
+    tag="bench",
+    xforms=XFORMS,
+)
+
+
+def make_rows(count: int) -> list:
+    spud = datetime(1980, 1, 1)
+    return [
+        {
+            "w_uwi": f"05123{i:07d}",
+            "w_well_name": f"Purr Unit {i}\x07",
+            "w_operator": "Acme Oil",
+            "w_spud_date": spud + timedelta(days=i % 10000),
+            "w_elevation": Decimal("5123.5"),
+            "w_total_depth": 8000.0 + i % 500,
+            "w_latitude": 40.1 + i / 1e6,
+            "w_longitude": -104.9 - i / 1e6,
+            "w_aliases": "A__purrDELIMITER____purrNULL____purrDELIMITER__B",
+        }
+        for i in range(count)
+    ]
+
+
+def original_xformer(xform_args):
+    """
+    The xformer from before compile_xforms (scalar types and delimited arrays
+    only; the blob decoders are benchmarked separately)
+    """
+    func_name, row, col, data_type, arg, purr_delimiter, purr_null = xform_args
+
+    def ensure_type(dtype, val):
+        if val is None:
+            return None
+        elif dtype == "object":
+            return None
+        elif dtype == "string":
+            return re.sub(r"[\u0000-\u001F\u007F-\u009F]", "", str(val))
+        elif dtype == "number":
+            if str(val).replace(" ", "") == "":
+                return None
+            try:
+                n = float(val)
+                return n if not math.isnan(n) else None
+            except ValueError:
+                return None
+        elif dtype == "date":
+            try:
+                return datetime.fromisoformat(str(val)).isoformat()
+            except (ValueError, TypeError):
+                return None
+        else:
+            return "XFORM ME"
+
+    if row.get(col) is None:
+        return None
+
+    if func_name == "delimited_array_with_nulls":
+        values = row[col].split(purr_delimiter)
+        return [ensure_type(data_type, v) if v != purr_null else None for v in values]
+    else:
+        return ensure_type(data_type, row[col])
+
+
+def compose_per_call(data, body) -> list:
+    """
+    The pre-plan compose_docs loop: an args tuple and an xformer call for
+    every column of every row
+    """
+    docs = []
+    id_base = str(body.repo_id) + str(body.asset) + str(body.suite) + str(body.repo_id)
+    for row in data:
+        o = {
+            "id": hashify(id_base + "".join([str(row[k]) for k in body.asset_id_keys])),
+            "well_id": "-".join([str(row[k]) for k in body.well_id_keys]),
+            "repo_id": body.repo_id,
+            "repo_name": body.repo_name,
+            "tag": body.tag,
+            "suite": body.suite,
+        }
+        for col, xf in body.xforms.items():
+            row[col] = original_xformer(
+                (
+                    xf.get("xform"),
+                    row,
+                    col,
+                    xf.get("ts_type"),
+                    xf.get("arg"),
+                    body.purr_delimiter,
+                    body.purr_null,
+                )
+            )
+        doc = {}
+        for prefix, table in body.prefixes.items():
+            doc[table] = {}
+            for key, val in row.items():
+                if key.startswith(prefix):
+                    doc[table][key.replace(prefix, "", 1)] = val
+        o["doc"] = doc
+        docs.append(o)
+    return docs
+
+
+def main():
+    rows = make_rows(ROWS)
+    plan = compile_xforms(BODY.xforms, BODY.purr_delimiter, BODY.purr_null)
+
+    def columns_of(data):
+        return {col: [row[col] for row in data] for col in data[0]}
+
+    runs = [
+        ("per-call", lambda data: compose_per_call(data, BODY), list),
+        ("plan", lambda data: compose_docs(data, BODY, plan), list),
+        ("columnar", lambda data: compose_column_docs(data, BODY, plan), columns_of),
+    ]
+
+    results = {}
+    for name, compose, shape in runs:
+        # xforms modify rows in place, so each run gets fresh input
+        data = shape(copy.deepcopy(rows))
+        t0 = time.perf_counter()
+        results[name] = compose(data)
+        secs = time.perf_counter() - t0
+        print(f"{name:>10}: {ROWS / secs:10,.0f} rows/s ({secs:.2f} s)")
+
+    assert results["per-call"] == results["plan"] == results["columnar"]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Keyset batches: check that the selects from keyset_boundaries and
+batch_keyset_selector cover every row exactly once, using sqlite in place of
+SQLAnywhere. Key columns are declared COLLATE NOCASE to act like the default
+(case-insensitive) GXDB collation.
+
+sqlite doesn't treat backslash as an escape (SQLAnywhere does), so string keys
+here avoid backslashes and sql_literal's escaping is checked on its own.
+
+run like this (from the repo root):
+python -m benchmarks.keyset_harness
+"""
+
+import random
+import sqlite3
+import asset.batcher as batcher
+from asset.batcher import batch_keyset_selector, keyset_boundaries, sql_literal
+
+CHUNKS = [1, 2, 7, 50, 1000, 5000]
+
+
+def sqlite_stream(db):
+    """
+    Stand-in for db_stream: yield blocks of row dicts from a sqlite connection
+    """
+
+    def stream(conn, sql, size=500, columnar=False):
+        cursor = db.execute(sql)
+        cols = [d[0] for d in cursor.description]
+        while True:
+            rows = cursor.fetchmany(size)
+            if not rows:
+                break
+            yield [dict(zip(cols, row)) for row in rows]
+
+    return stream
+
+
+def make_db() -> sqlite3.Connection:
+    rng = random.Random(0)
+    db = sqlite3.connect(":memory:")
+
+    # single, unique integer key
+    db.execute("CREATE TABLE single (id INTEGER, val INTEGER)")
+    ids = list(range(1, 1001))
+    rng.shuffle(ids)
+    db.executemany("INSERT INTO single VALUES (?, ?)", [(i, i % 5) for i in ids])
+
+    # composite key with case variants, quotes and runs of duplicate uwis
+    db.execute(
+        "CREATE TABLE composite "
+        "(uwi TEXT COLLATE NOCASE, seq INTEGER, id INTEGER, val INTEGER)"
+    )
+    uwis = ["abc", "ABC", "Abd", "O'Neil", "o'neil", "x", "X-1", "z"]
+    uwis += [f"{rng.randrange(10**9):09d}" for _ in range(200)]
+    rows = []
+    for uwi in uwis:
+        for seq in range(rng.randrange(1, 12)):
+            rows.append((uwi, seq, len(rows), len(rows) % 5))
+    rng.shuffle(rows)
+    db.executemany("INSERT INTO composite VALUES (?, ?, ?, ?)", rows)
+
+    # a non-unique single key, with runs longer than most chunks
+    db.execute("CREATE TABLE dupes (uwi TEXT COLLATE NOCASE, id INTEGER)")
+    rows = [(f"w{i // 75:03d}", i) for i in range(3000)]
+    rows += [(f"W{i // 75:03d}", 3000 + i) for i in range(0, 3000, 150)]
+    db.executemany("INSERT INTO dupes VALUES (?, ?)", rows)
+
+    # a null key means keyset batches can't be used
+    db.execute("CREATE TABLE nulls (uwi TEXT, id INTEGER)")
+    db.executemany("INSERT INTO nulls VALUES (?, ?)", [("a", 1), (None, 2)])
+    return db
+
+
+def check(db, table, keys, where, chunk) -> int:
+    """
+    Every row matching where lands in exactly one batch, no batch is empty
+    :return: number of batches
+    """
+    select = f"SELECT * FROM {table}"
+    boundaries = keyset_boundaries(None, keys, chunk, select, where)
+    assert boundaries is not None, (table, keys, chunk)
+
+    selectors = batch_keyset_selector((boundaries, keys, select, where))
+    seen = []
+    for sql in selectors:
+        ids = [r[0] for r in db.execute(sql.replace("SELECT *", "SELECT id", 1))]
+        assert ids, f"empty batch: {sql}"
+        seen.extend(ids)
+
+    expected = [r[0] for r in db.execute(f"SELECT id FROM {table} {where}")]
+    assert len(seen) == len(set(seen)), f"duplicated rows: {table} {keys} {chunk}"
+    assert sorted(seen) == sorted(expected), f"missed rows: {table} {keys} {chunk}"
+    return len(selectors)
+
+
+def main():
+    assert sql_literal("O'Neil") == "'O''Neil'"
+    assert sql_literal("C:\\gxdb\\") == "'C:\\\\gxdb\\\\'"
+    assert sql_literal(None) is None and sql_literal(True) is None
+
+    db = make_db()
+    batcher.db_stream = sqlite_stream(db)
+
+    cases = [
+        ("single", ["id"], "WHERE 1=1"),
+        ("single", ["id"], "WHERE 1=1 AND val <> 3"),
+        ("composite", ["uwi", "seq"], "WHERE 1=1"),
+        ("composite", ["uwi", "seq"], "WHERE 1=1 AND val <> 3"),
+        ("composite", ["uwi"], "WHERE 1=1"),
+        ("dupes", ["uwi"], "WHERE 1=1"),
+        ("dupes", ["uwi", "id"], "WHERE 1=1"),
+    ]
+    for table, keys, where in cases:
+        counts = [check(db, table, keys, where, chunk) for chunk in CHUNKS]
+        print(f"{table:<10} {', '.join(keys):<10} {where:<24} batches: {counts}")
+
+    assert keyset_boundaries(None, ["uwi"], 1, "SELECT * FROM nulls", "") is None
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,6 @@ import os
 import sys
 import simplejson as json
 from common.messenger import Messenger
-from common.sb_client import SupabaseClient
 from dotenv import load_dotenv
 
 # CRITICAL
@@ -60,8 +59,7 @@ class Logger:
         # critical to avoid double-stream to root logger
         self.logger.propagate = False
 
-        self.sb_client = SupabaseClient()
-        self.messenger = Messenger(self.sb_client)
+        self.messenger = Messenger()
 
         formatter = logging.Formatter(
             f"%(asctime)s - %(name)s - %(levelname)s - {source} | %(message)s"
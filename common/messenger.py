@@ -1,11 +1,50 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from dotenv import load_dotenv
+from common.sb_client import get_sb_client
 from common.typeish import Message, validate_message
 from common.util import hostname
 
+load_dotenv()
+
+# messages per bulk insert
+MESSAGE_BATCH_SIZE = int(os.environ.get("MESSAGE_BATCH_SIZE") or 100)
+
+# max seconds a message waits for its batch to fill up
+MESSAGE_FLUSH_SECONDS = float(os.environ.get("MESSAGE_FLUSH_SECONDS") or 1)
+
+# unsent messages held in memory. When full, notes are dropped and other
+# directives (busy, done...) wait up to MESSAGE_PUT_SECONDS for room.
+MESSAGE_QUEUE_SIZE = int(os.environ.get("MESSAGE_QUEUE_SIZE") or 10000)
+MESSAGE_PUT_SECONDS = float(os.environ.get("MESSAGE_PUT_SECONDS") or 5)
+
+# pause before retrying a failed bulk insert
+MESSAGE_RETRY_SECONDS = 2
+
+# how long halt/exit waits for the last batches to go out
+MESSAGE_CLOSE_SECONDS = 10
+
+_CLOSE = object()
+
 
 class Messenger:
-    def __init__(self, sb_client):
-        self.sb_client = sb_client
-        self.user_id = sb_client.user_id()
+    """
+    Messages are queued and written to the supabase message table in bulk by
+    a background thread, so callers never wait on supabase (see
+    MESSAGE_QUEUE_SIZE for what happens when it can't keep up). The shared
+    supabase client isn't needed until the first message is sent.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=MESSAGE_QUEUE_SIZE)
+        self.lock = threading.Lock()
+        self.thread = None
+        self.metrics = {"sent": 0, "failed": 0, "dropped": 0, "batches": 0}
+        # close() does nothing if the thread isn't running
+        atexit.register(self.close)
 
     # def send(self, message):
     #     base = {"user_id": self.user_id, "worker": hostname()}
@@ -17,9 +56,17 @@ class Messenger:
     #         print(e)
     #         print("!!!!!!!!!!!!!!!!!!!!!!")
 
+    def start(self) -> None:
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(
+                    target=self.drain, name="messenger", daemon=True
+                )
+                self.thread.start()
+
     def send(self, directive, repo_id=None, data=None, workflow=None):
         message = {
-            "user_id": self.user_id,
+            "user_id": get_sb_client().user_id(),
             "worker": hostname(),
             "directive": directive,
             "repo_id": repo_id,
@@ -27,7 +74,99 @@ class Messenger:
             "workflow": workflow,
         }
         msg: Message = validate_message(message)
+        if msg is None:
+            return
+
+        self.start()
+        if directive == "note":
+            try:
+                self.queue.put_nowait(msg.to_dict())
+            except queue.Full:
+                with self.lock:
+                    self.metrics["dropped"] += 1
+        else:
+            # don't hold up a task for long if supabase is down
+            try:
+                self.queue.put(msg.to_dict(), timeout=MESSAGE_PUT_SECONDS)
+            except queue.Full:
+                print(f"message queue full, dropped {directive} message")
+                with self.lock:
+                    self.metrics["dropped"] += 1
+
+    def next_batch(self) -> tuple:
+        """
+        Block for the first message, then collect more until the batch is full
+        or MESSAGE_FLUSH_SECONDS have passed
+        :return: (list of message dicts, True if close() was called)
+        """
+        first = self.queue.get()
+        if first is _CLOSE:
+            return [], True
+
+        batch = [first]
+        deadline = time.monotonic() + MESSAGE_FLUSH_SECONDS
+        while len(batch) < MESSAGE_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            try:
+                msg = self.queue.get(timeout=max(remaining, 0))
+            except queue.Empty:
+                break
+            if msg is _CLOSE:
+                return batch, True
+            batch.append(msg)
+        return batch, False
+
+    def insert(self, rows: list) -> bool:
         try:
-            self.sb_client.table("message").insert(msg.to_dict()).execute()
+            get_sb_client().table("message").insert(rows).execute()
+            return True
         except Exception as e:
             print(e)
+            return False
+
+    def send_batch(self, batch: list) -> int:
+        """
+        Bulk insert a batch, retrying once. If it still fails, insert the
+        state directives (busy, done...) one by one, so a bad row doesn't take
+        them down with it; notes in the batch are given up.
+        :param batch: list of message dicts
+        :return: number of messages sent
+        """
+        if self.insert(batch):
+            return len(batch)
+        time.sleep(MESSAGE_RETRY_SECONDS)
+        if self.insert(batch):
+            return len(batch)
+        states = [msg for msg in batch if msg.get("directive") != "note"]
+        return sum(self.insert([msg]) for msg in states)
+
+    def drain(self) -> None:
+        closing = False
+        while not closing:
+            batch, closing = self.next_batch()
+            if not batch:
+                continue
+            sent = self.send_batch(batch)
+            with self.lock:
+                self.metrics["batches"] += 1
+                self.metrics["sent"] += sent
+                self.metrics["failed"] += len(batch) - sent
+
+    def close(self, timeout: float = MESSAGE_CLOSE_SECONDS) -> None:
+        """
+        Send whatever is still queued and stop the background thread
+        :param timeout: Seconds to wait for the queue to drain
+        """
+        with self.lock:
+            thread, self.thread = self.thread, None
+        if thread is None:
+            return
+        try:
+            self.queue.put(_CLOSE, timeout=timeout)
+        except queue.Full:
+            return
+        thread.join(timeout)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"queued": self.queue.qsize(), **self.metrics}
@@ -0,0 +1,227 @@
+import os
+import threading
+import time
+import psycopg2
+from contextlib import contextmanager
+from dotenv import load_dotenv
+from psycopg2 import extensions, pool
+from common.logger import Logger
+from common.util import local_pg_params
+from typing import Optional
+
+load_dotenv()
+logger = Logger(__name__)
+
+# wait this long for a free connection before giving up
+PG_POOL_TIMEOUT = 60
+
+# warn about connections checked out longer than this (seconds)
+PG_LEAK_SECONDS = int(os.environ.get("PG_LEAK_SECONDS") or 900)
+
+# ping idle connections (SELECT 1) if they sat in the pool this long
+PG_PING_SECONDS = 300
+
+
+class PgPool:
+    """
+    A thread-safe pool of local PostgreSQL connections shared by the loader,
+    search and export. ThreadedConnectionPool raises when it runs dry, so
+    checkouts are gated with a semaphore to wait for a free connection instead.
+    """
+
+    def __init__(self, maxconn: int, minconn: int = 1):
+        self.maxconn = maxconn
+        self.pool = pool.ThreadedConnectionPool(minconn, maxconn, **local_pg_params())
+        self.slots = threading.BoundedSemaphore(maxconn)
+        self.lock = threading.Lock()
+        self.checked_out = {}  # id(conn) -> {since, thread, warned}
+        self.idle_since = {}  # id(conn) -> time returned to pool
+        self.metrics = {
+            "checkouts": 0,
+            "discarded": 0,
+            "leaks": 0,
+            "wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+        }
+
+    def is_healthy(self, conn) -> bool:
+        """
+        Cheap checks first; only ping connections that sat idle for a while
+        :param conn: A pooled psycopg2 connection
+        :return: True if the connection looks usable
+        """
+        if conn.closed:
+            return False
+        if conn.info.transaction_status == extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+        idle = time.monotonic() - self.idle_since.get(id(conn), time.monotonic())
+        if idle > PG_PING_SECONDS:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+                conn.rollback()
+            except psycopg2.Error:
+                return False
+        return True
+
+    def check_leaks(self) -> None:
+        """
+        Log (once) any connection held longer than PG_LEAK_SECONDS
+        """
+        now = time.monotonic()
+        with self.lock:
+            for held in self.checked_out.values():
+                if not held["warned"] and now - held["since"] > PG_LEAK_SECONDS:
+                    held["warned"] = True
+                    self.metrics["leaks"] += 1
+                    logger.warning(
+                        f"possible pg connection leak: held by {held['thread']} "
+                        f"for {now - held['since']:.0f} seconds"
+                    )
+
+    def getconn(self):
+        """
+        Check out a healthy connection, waiting up to PG_POOL_TIMEOUT seconds
+        :return: psycopg2 connection
+        """
+        self.check_leaks()
+
+        t0 = time.monotonic()
+        if not self.slots.acquire(timeout=PG_POOL_TIMEOUT):
+            raise pool.PoolError(f"no pg connection free after {PG_POOL_TIMEOUT}s")
+        waited = time.monotonic() - t0
+
+        try:
+            conn = self.pool.getconn()
+            while not self.is_healthy(conn):
+                self.discard(conn)
+                conn = self.pool.getconn()
+        except Exception:
+            self.slots.release()
+            raise
+
+        with self.lock:
+            self.idle_since.pop(id(conn), None)
+            self.checked_out[id(conn)] = {
+                "since": time.monotonic(),
+                "thread": threading.current_thread().name,
+                "warned": False,
+            }
+            self.metrics["checkouts"] += 1
+            self.metrics["wait_seconds"] += waited
+            self.metrics["max_wait_seconds"] = max(
+                self.metrics["max_wait_seconds"], waited
+            )
+        return conn
+
+    def discard(self, conn) -> None:
+        with self.lock:
+            self.idle_since.pop(id(conn), None)
+            self.metrics["discarded"] += 1
+        self.pool.putconn(conn, close=True)
+
+    def putconn(self, conn, broken: bool = False) -> None:
+        """
+        Return a connection. Anything left in a transaction is rolled back, and
+        broken connections are closed rather than reused.
+        :param conn: A connection from getconn()
+        :param broken: True if the caller saw a connection-level error
+        """
+        with self.lock:
+            self.checked_out.pop(id(conn), None)
+        try:
+            if not broken and not conn.closed:
+                status = conn.info.transaction_status
+                if status != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+        except psycopg2.Error:
+            broken = True
+
+        if broken or conn.closed:
+            self.discard(conn)
+        else:
+            with self.lock:
+                self.idle_since[id(conn)] = time.monotonic()
+            self.pool.putconn(conn)
+        self.slots.release()
+
+    def stats(self) -> dict:
+        """
+        Pool metrics for monitoring
+        :return: dict of sizes and counters
+        """
+        with self.lock:
+            return {
+                "max_size": self.maxconn,
+                "in_use": len(self.checked_out),
+                "idle": len(self.idle_since),
+                **self.metrics,
+            }
+
+    def closeall(self) -> None:
+        self.pool.closeall()
+
+
+_pg_pool = None
+_pg_pool_lock = threading.Lock()
+
+
+def pg_pool_size() -> int:
+    """
+    One connection per worker thread that might need local PostgreSQL
+    :return: pool size
+    """
+    work = int(os.environ.get("WORK_MAX_WORKERS") or 1)
+    search = int(os.environ.get("SEARCH_MAX_WORKERS") or 1)
+    return work + search
+
+
+def get_pg_pool() -> PgPool:
+    """
+    Lazily create the process-wide pool
+    :return: PgPool
+    """
+    global _pg_pool
+    with _pg_pool_lock:
+        if _pg_pool is None:
+            _pg_pool = PgPool(pg_pool_size())
+        return _pg_pool
+
+
+def pg_pool_stats() -> Optional[dict]:
+    """
+    Stats of the process-wide pool, without creating it
+    :return: PgPool.stats() or None if there is no pool yet
+    """
+    with _pg_pool_lock:
+        return _pg_pool.stats() if _pg_pool is not None else None
+
+
+def close_pg_pool() -> None:
+    global _pg_pool
+    with _pg_pool_lock:
+        if _pg_pool is not None:
+            logger.info(f"closing pg pool: {_pg_pool.stats()}")
+            _pg_pool.closeall()
+            _pg_pool = None
+
+
+@contextmanager
+def pg_conn():
+    """
+    Borrow a local PostgreSQL connection from the shared pool:
+        with pg_conn() as conn:
+            ...
+    The connection is returned (and rolled back if still in a transaction)
+    on exit. Commit explicitly.
+    """
+    pg_pool = get_pg_pool()
+    conn = pg_pool.getconn()
+    broken = False
+    try:
+        yield conn
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        broken = True
+        raise
+    finally:
+        pg_pool.putconn(conn, broken=broken)
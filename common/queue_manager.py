@@ -1,33 +1,273 @@
-import queue
+import os
 import threading
+import time
 import concurrent.futures
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from dotenv import load_dotenv
+from typing import Deque, Dict, Optional, Tuple
+
+load_dotenv()
+
+# relative share of worker threads each directive gets when several are queued
+DEFAULT_WEIGHTS = {
+    "halt": 100,
+    "recon": 4,
+    "batcher": 4,
+    "search": 4,
+    "export": 2,
+    "loader": 1,
+}
+
+# tasks for any one repo (i.e. one gxdb.db) running at once
+QUEUE_REPO_MAX = int(os.environ.get("QUEUE_REPO_MAX") or 2)
+
+# tasks held locally (not yet running) before new ones are turned away and
+# left PENDING in supabase. 0 means no limit.
+QUEUE_MAX_PENDING = int(os.environ.get("QUEUE_MAX_PENDING") or 0)
+
+
+def parse_weights(spec: Optional[str]) -> Dict[str, float]:
+    """
+    Override DEFAULT_WEIGHTS with a spec like "loader:1,recon:8" (QUEUE_WEIGHTS)
+    :param spec: Comma-separated directive:weight pairs
+    :return: dict of directive weights
+    """
+    weights = dict(DEFAULT_WEIGHTS)
+    for pair in (spec or "").split(","):
+        if ":" in pair:
+            directive, weight = pair.split(":", 1)
+            weights[directive.strip()] = float(weight)
+    return weights
+
+
+QUEUE_WEIGHTS = parse_weights(os.environ.get("QUEUE_WEIGHTS"))
+
+
+def task_repo(task) -> Optional[str]:
+    return getattr(task.body, "repo_id", None)
+
+
+@dataclass
+class Lane:
+    """
+    Tasks of one directive, in arrival order, plus their scheduling stats
+    """
+
+    weight: float
+    tasks: Deque[Tuple[float, object]] = field(default_factory=deque)
+    vtime: float = 0.0
+    dispatched: int = 0
+    wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
 
 
 class QueueManager:
-    def __init__(self, max_workers):
-        self.queue = queue.Queue()
+    """
+    Run tasks on a pool of max_workers threads. Each directive gets its own
+    lane, and a free thread goes to the lane that has had the least service
+    relative to its weight (stride scheduling), so a big batch of loader tasks
+    can't starve recon or batcher tasks behind it. Within a lane tasks run in
+    arrival order, except that tasks for a repo already running
+    QUEUE_REPO_MAX tasks are passed over until one finishes.
+    A task is only taken off its lane once fewer than max_workers tasks are
+    running, so nothing waits inside the executor, and a task isn't marked PROCESSING
+    (by the task handler) until it really starts.
+    """
+
+    def __init__(
+        self,
+        max_workers,
+        weights=None,
+        repo_max=QUEUE_REPO_MAX,
+        max_pending=QUEUE_MAX_PENDING,
+    ):
         self.max_workers = max_workers
+        self.weights = weights or QUEUE_WEIGHTS
+        self.repo_max = repo_max
+        self.max_pending = max_pending
+        self.cond = threading.Condition()
+        self.local = threading.local()
+        self.lanes: Dict[str, Lane] = {}
+        self.vclock = 0.0
+        self.active = 0
+        self.repo_active = defaultdict(int)
+        self.rejected = 0
         self.running = True
+        self.draining = False
+        self.executor = None
         self.thread = None
 
-    def add_task(self, task):
-        self.queue.put(task)
+    def pending(self) -> int:
+        return sum(len(lane.tasks) for lane in self.lanes.values())
+
+    def add_task(self, task) -> bool:
+        """
+        Queue a task, unless we're stopping or already holding max_pending
+        :param task: A validated task
+        :return: False if the task was turned away (it stays PENDING)
+        """
+        with self.cond:
+            if not self.running or (
+                self.max_pending and self.pending() >= self.max_pending
+            ):
+                self.rejected += 1
+                return False
+            lane = self.lanes.get(task.directive)
+            if lane is None:
+                weight = self.weights.get(task.directive, 1)
+                lane = self.lanes[task.directive] = Lane(weight=weight)
+            if not lane.tasks:
+                # an idle lane doesn't bank credit while it's empty
+                lane.vtime = max(lane.vtime, self.vclock)
+            lane.tasks.append((time.monotonic(), task))
+            self.cond.notify()
+            return True
+
+    def pick(self) -> Optional[object]:
+        """
+        Take the next runnable task. Call with self.cond held.
+        :return: a task, or None if nothing can run right now
+        """
+        lanes = sorted(
+            (lane for lane in self.lanes.values() if lane.tasks),
+            key=lambda lane: lane.vtime,
+        )
+        for lane in lanes:
+            for i, (queued_at, task) in enumerate(lane.tasks):
+                repo = task_repo(task)
+                if repo is not None and self.repo_active[repo] >= self.repo_max:
+                    continue
+                del lane.tasks[i]
+
+                waited = time.monotonic() - queued_at
+                lane.dispatched += 1
+                lane.wait_seconds += waited
+                lane.max_wait_seconds = max(lane.max_wait_seconds, waited)
+
+                self.vclock = lane.vtime
+                lane.vtime += 1 / lane.weight
+                self.active += 1
+                if repo is not None:
+                    self.repo_active[repo] += 1
+                return task
+        return None
+
+    def next_task(self) -> Optional[object]:
+        """
+        Wait for a free worker and a runnable task. After stop(), keep going
+        only while draining. Waiting on self.cond (rather than a semaphore)
+        means stop() always wakes us, even when every worker is busy.
+        :return: a task, or None when there is nothing left to run
+        """
+        with self.cond:
+            while True:
+                if (self.running or self.draining) and self.active < self.max_workers:
+                    task = self.pick()
+                    if task:
+                        return task
+                if not self.running and not (self.draining and self.pending()):
+                    return None
+                self.cond.wait(timeout=1)
+
+    def run_task(self, task_handler, task) -> None:
+        self.local.in_task = True
+        self.local.released = False
+        try:
+            task_handler(task)
+        finally:
+            repo = task_repo(task)
+            with self.cond:
+                # stop() may have given up this task's worker already
+                if not self.local.released:
+                    self.active -= 1
+                if repo is not None:
+                    self.repo_active[repo] -= 1
+                    if not self.repo_active[repo]:
+                        del self.repo_active[repo]
+                self.cond.notify_all()
 
     def process_queue(self, task_handler):
+        # next_task limits running tasks to max_workers; the spare thread is
+        # for draining while a task (i.e. halt) sits in stop()
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_workers + 1
+        )
+
         def worker():
-            with concurrent.futures.ThreadPoolExecutor(
-                max_workers=self.max_workers
-            ) as executor:
-                while self.running:
-                    try:
-                        task = self.queue.get(block=True, timeout=1)
-                        executor.submit(task_handler, task)
-                    except queue.Empty:
-                        continue
+            while True:
+                task = self.next_task()
+                if task is None:
+                    break
+                self.executor.submit(self.run_task, task_handler, task)
+            # stop() does the waiting (it may be called from a task thread)
+            self.executor.shutdown(wait=False)
 
         self.thread = threading.Thread(target=worker, daemon=True)
         self.thread.start()
 
-    def stop(self):
-        self.running = False
-        self.thread.join()
+    def stats(self) -> dict:
+        """
+        Queue depth and wait times per directive, for monitoring
+        :return: dict of counters
+        """
+        with self.cond:
+            return {
+                "active": self.active,
+                "max_workers": self.max_workers,
+                "pending": self.pending(),
+                "rejected": self.rejected,
+                "repos_active": dict(self.repo_active),
+                "lanes": {
+                    directive: {
+                        "depth": len(lane.tasks),
+                        "weight": lane.weight,
+                        "dispatched": lane.dispatched,
+                        "avg_wait_seconds": (
+                            lane.wait_seconds / lane.dispatched
+                            if lane.dispatched
+                            else 0.0
+                        ),
+                        "max_wait_seconds": lane.max_wait_seconds,
+                    }
+                    for directive, lane in self.lanes.items()
+                },
+            }
+
+    def stop(self, drain: bool = False, timeout: Optional[float] = None) -> bool:
+        """
+        Stop taking tasks and wait for running ones to finish. Queued tasks are
+        either run first (drain) or dropped, which leaves them PENDING for
+        another worker. Safe to call from a task (e.g. halt); that task isn't
+        waited on.
+        :param drain: Also run every queued task before stopping
+        :param timeout: Max seconds to wait (None waits forever)
+        :return: True if everything finished within the timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        in_task = getattr(self.local, "in_task", False)
+
+        with self.cond:
+            if in_task and not self.local.released:
+                # the calling task's worker is free to drain with (and it
+                # isn't waited on), even if it's the only one
+                self.local.released = True
+                self.active -= 1
+            self.running = False
+            self.draining = drain
+            if not drain:
+                for lane in self.lanes.values():
+                    lane.tasks.clear()
+            self.cond.notify_all()
+
+            while self.active or (drain and self.pending()):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.cond.wait(remaining)
+
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(
+                None if deadline is None else max(deadline - time.monotonic(), 0)
+            )
+        return True
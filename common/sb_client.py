@@ -1,34 +1,98 @@
 import os
+import threading
+import time
 from supabase import create_client
+from supabase.lib.client_options import ClientOptions
+
+# refresh the session JWT when it has less than this many seconds left
+JWT_REFRESH_MARGIN = int(os.environ.get("JWT_REFRESH_MARGIN") or 120)
 
 
 class SupabaseClient:
     """
-    A simplified proxy for the real supabase client
+    A simplified proxy for the real supabase client. The session is checked
+    before every request and refreshed shortly before its JWT expires, so we
+    don't have to catch (and retry) "JWT expired" errors. Use get_sb_client()
+    to share one signed-in client per process.
     """
 
     def __init__(self):
         sb_url: str = os.environ.get("SUPABASE_URL")
         sb_key: str = os.environ.get("SUPABASE_KEY")
-        self.client = create_client(sb_url, sb_key)
+        # we refresh on demand instead of gotrue's timer thread
+        self.client = create_client(
+            sb_url, sb_key, options=ClientOptions(auto_refresh_token=False)
+        )
+        self.lock = threading.RLock()
+        self.session = None
+        self.expires_at = 0.0
         self.sign_in()
 
+    def set_session(self, session) -> None:
+        self.session = session
+        self.expires_at = session.expires_at or time.time() + session.expires_in
+
     def sign_in(self):
         sb_email: str = os.environ.get("SUPABASE_EMAIL")
         sb_password: str = os.environ.get("SUPABASE_PASSWORD")
-        self.client.auth.sign_in_with_password(
-            {"email": sb_email, "password": sb_password}
-        )
+        with self.lock:
+            res = self.client.auth.sign_in_with_password(
+                {"email": sb_email, "password": sb_password}
+            )
+            self.set_session(res.session)
+
+    def is_expiring(self) -> bool:
+        return time.time() > self.expires_at - JWT_REFRESH_MARGIN
+
+    def ensure_session(self) -> None:
+        """
+        Refresh the session if its JWT is about to expire. If the refresh token
+        is rejected, sign in again.
+        """
+        if not self.is_expiring():
+            return
+        with self.lock:
+            # another thread may have refreshed while we waited
+            if not self.is_expiring():
+                return
+            try:
+                res = self.client.auth.refresh_session(self.session.refresh_token)
+                self.set_session(res.session)
+            except Exception as err:
+                # common.logger imports this module (via the messenger)
+                from common.logger import Logger
+
+                Logger(__name__).warning(
+                    f"session refresh failed, signing in again: {err}"
+                )
+                self.sign_in()
 
     def user_id(self):
-        res = self.client.auth.get_user()
-        return res.user.id
+        return self.session.user.id
 
     def sign_out(self):
         self.client.auth.sign_out()
 
     def table(self, table_name):
+        self.ensure_session()
         return self.client.table(table_name)
 
     def invoke_function(self, function_name, invoke_options=None):
+        self.ensure_session()
         return self.client.functions.invoke(function_name, invoke_options)
+
+
+_sb_client = None
+_sb_client_lock = threading.Lock()
+
+
+def get_sb_client() -> SupabaseClient:
+    """
+    Lazily create (and sign in) the process-wide client
+    :return: SupabaseClient
+    """
+    global _sb_client
+    with _sb_client_lock:
+        if _sb_client is None:
+            _sb_client = SupabaseClient()
+        return _sb_client
@@ -0,0 +1,76 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# how long a (task id, status) pair is remembered once its task has run
+TASK_DEDUP_SECONDS = int(os.environ.get("TASK_DEDUP_SECONDS") or 600)
+
+
+class SeenTasks:
+    """
+    Remember queued tasks by (task id, status) so that repeated realtime
+    events (INSERT, then UPDATE...) and polls for the same task are dropped
+    instead of being queued again. An entry is held for as long as its task
+    is queued or running, then expires ttl seconds after done() is called.
+    """
+
+    def __init__(self, ttl: float = TASK_DEDUP_SECONDS):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.queued = set()  # (id, status) of tasks not yet done
+        self.seen = OrderedDict()  # (id, status) -> time done
+        self.metrics = {"accepted": 0, "duplicates": 0}
+
+    def evict(self, now: float) -> None:
+        while self.seen:
+            seen_at = next(iter(self.seen.values()))
+            if now - seen_at < self.ttl:
+                break
+            self.seen.popitem(last=False)
+
+    def add(self, task_id, status: str) -> bool:
+        """
+        :param task_id: The task's id
+        :param status: The task's status in the event
+        :return: False if this (task id, status) was already seen
+        """
+        now = time.monotonic()
+        key = (task_id, status)
+        with self.lock:
+            self.evict(now)
+            if key in self.queued or key in self.seen:
+                self.metrics["duplicates"] += 1
+                return False
+            self.queued.add(key)
+            self.metrics["accepted"] += 1
+            return True
+
+    def done(self, task_id, status: str) -> None:
+        """
+        The task has run (or was skipped); start its entry's ttl
+        """
+        key = (task_id, status)
+        with self.lock:
+            self.queued.discard(key)
+            self.seen[key] = time.monotonic()
+            self.seen.move_to_end(key)
+
+    def forget(self, task_id, status: str) -> None:
+        """
+        Let a task through again (e.g. one we couldn't queue after all)
+        """
+        with self.lock:
+            self.queued.discard((task_id, status))
+            self.seen.pop((task_id, status), None)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "queued": len(self.queued),
+                "tracked": len(self.seen),
+                **self.metrics,
+            }
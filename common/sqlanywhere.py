@@ -1,28 +1,205 @@
 import pyodbc
 import os
 import re
+import threading
+import time
+from contextlib import closing, contextmanager
+from dotenv import load_dotenv
 from retry import retry
 from common.logger import Logger
 from common.util import normalize_path, RetryException
 from common.typeish import SQLAnywhereConn
 
-from typing import List, Dict, Any
+from typing import Any, Dict, Iterator, List
 
+load_dotenv()
 logger = Logger(__name__)
 
-# TODO: make this context aware, use "with..."
+# concurrent connections allowed to any one repo (gxdb.db)
+SQLA_MAX_PER_REPO = int(os.environ.get("SQLA_MAX_PER_REPO") or 2)
+
+# close cached connections that sat unused this long (seconds)
+SQLA_IDLE_SECONDS = int(os.environ.get("SQLA_IDLE_SECONDS") or 300)
+
+# wait this long for a connection slot to a busy repo
+SQLA_WAIT_SECONDS = 300
+
+# rows per fetchmany block in db_stream
+DB_FETCH_SIZE = 1000
+
+# optional conn key: seconds before each statement is cancelled (0: no limit)
+QUERY_TIMEOUT = "query_timeout"
+
+
+def repo_key(conn: dict) -> tuple:
+    """
+    SQLAnywhere connections are cached per database, i.e. server + dbn
+    :param conn: SQLAnywhere connection params
+    :return: hashable cache key
+    """
+    return conn.get("server"), conn.get("dbn")
+
+
+class SQLAnywhereCache:
+    """
+    Keep SQLAnywhere connections open between db_exec calls, keyed by repo.
+    Opening a connection (and autostarting gxdb.db) is expensive, so each
+    batcher count, loader chunk and recon query reuses an idle one. At most
+    max_per_repo connections exist per repo; idle ones are closed after
+    idle_seconds by a janitor thread.
+    """
+
+    def __init__(self, max_per_repo: int, idle_seconds: int):
+        self.max_per_repo = max_per_repo
+        self.idle_seconds = idle_seconds
+        self.cond = threading.Condition()
+        self.idle = {}  # key -> [(connection, last_used), ...]
+        self.open = {}  # key -> number of open connections (idle + in use)
+        self.generation = {}  # key -> bumped by invalidate()
+        self.janitor = None
+
+    def start_janitor(self) -> None:
+        def sweep():
+            while True:
+                time.sleep(max(self.idle_seconds / 2, 1))
+                self.evict_idle()
+
+        if self.janitor is None:
+            self.janitor = threading.Thread(target=sweep, daemon=True)
+            self.janitor.start()
+
+    def acquire(self, conn: dict):
+        """
+        Get an idle cached connection or open a new one (if under the limit)
+        :param conn: SQLAnywhere connection params
+        :return: (pyodbc connection, generation)
+        """
+        key = repo_key(conn)
+        with self.cond:
+            self.start_janitor()
+            deadline = time.monotonic() + SQLA_WAIT_SECONDS
+            while not self.idle.get(key) and self.open.get(key, 0) >= self.max_per_repo:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"no SQLAnywhere connection free: {key}")
+                self.cond.wait(remaining)
+
+            generation = self.generation.get(key, 0)
+            if self.idle.get(key):
+                connection, _ = self.idle[key].pop()
+                return connection, generation
+            self.open[key] = self.open.get(key, 0) + 1
+
+        params = {k: v for k, v in conn.items() if k != QUERY_TIMEOUT}
+        try:
+            return pyodbc.connect(**params, autocommit=True), generation
+        except Exception:
+            with self.cond:
+                self.open[key] -= 1
+                self.cond.notify_all()
+            raise
+
+    def release(self, conn: dict, connection, generation: int, broken=False):
+        """
+        Return a connection to the cache. Broken or invalidated connections
+        are closed instead.
+        """
+        key = repo_key(conn)
+        with self.cond:
+            if broken or generation != self.generation.get(key, 0):
+                self.close_connection(key, connection)
+            else:
+                self.idle.setdefault(key, []).append((connection, time.monotonic()))
+            self.cond.notify_all()
+
+    def close_connection(self, key, connection) -> None:
+        # caller holds self.cond
+        self.open[key] -= 1
+        try:
+            connection.close()
+        except pyodbc.Error:
+            pass
+
+    def invalidate(self, conn: dict) -> None:
+        """
+        Close idle connections to a repo and mark in-use ones to be closed when
+        they are released (i.e. after "Database name not unique").
+        """
+        key = repo_key(conn)
+        with self.cond:
+            self.generation[key] = self.generation.get(key, 0) + 1
+            for connection, _ in self.idle.pop(key, []):
+                self.close_connection(key, connection)
+            self.cond.notify_all()
+
+    def evict_idle(self) -> None:
+        cutoff = time.monotonic() - self.idle_seconds
+        with self.cond:
+            for key, idle in self.idle.items():
+                for connection, last_used in [c for c in idle if c[1] < cutoff]:
+                    idle.remove((connection, last_used))
+                    self.close_connection(key, connection)
+            self.cond.notify_all()
+
+    def close_all(self) -> None:
+        with self.cond:
+            for key, idle in self.idle.items():
+                for connection, _ in idle:
+                    self.close_connection(key, connection)
+            self.idle = {}
+            self.cond.notify_all()
+
+    def stats(self) -> dict:
+        with self.cond:
+            return {
+                f"{server}/{dbn}": {
+                    "open": count,
+                    "idle": len(self.idle.get((server, dbn), [])),
+                }
+                for (server, dbn), count in self.open.items()
+                if count
+            }
+
+
+sqla_cache = SQLAnywhereCache(SQLA_MAX_PER_REPO, SQLA_IDLE_SECONDS)
+
+
+@contextmanager
+def sqla_conn(conn: dict):
+    """
+    Borrow a cached SQLAnywhere connection for a repo:
+        with sqla_conn(repo.conn.to_dict()) as connection:
+            ...
+    Connections that raise connection-level errors (including a statement
+    cancelled by conn["query_timeout"]) are not reused.
+    :param conn: SQLAnywhere connection params
+    """
+    connection, generation = sqla_cache.acquire(conn)
+    broken = False
+    try:
+        # cached connections are shared, so always (re)set the statement timeout
+        connection.timeout = conn.get(QUERY_TIMEOUT) or 0
+        yield connection
+    except (pyodbc.OperationalError, pyodbc.InterfaceError):
+        broken = True
+        raise
+    finally:
+        sqla_cache.release(conn, connection, generation, broken)
 
 
 # @basic_log
 @retry(RetryException, tries=5)
 def db_exec(
-    conn: dict | SQLAnywhereConn, sql: List[str] or str
-) -> List[Dict[str, Any]] | List[List[Dict[str, Any]]]:
+    conn: dict | SQLAnywhereConn, sql: List[str] or str, columnar: bool = False
+) -> List[Dict[str, Any]] | List[List[Dict[str, Any]]] | Dict[str, list]:
     """
-    Connect to SQLAnywhere and Run SQL commands from str or list.
+    Connect to SQLAnywhere and Run SQL commands from str or list. Connections
+    are borrowed from (and returned to) the per-repo sqla_cache.
     Results are returned as {desc: (column description), rows: (list of rows)}.
     If sql is a single string, a single result dict is returned.
     If sql is a list of commands, results will be a list of dicts.
+    If columnar (single sql only), results are a dict of column name to a list
+    of that column's values, i.e. {"uwi": [...], "well_name": [...]}.
 
     If the gxdb.db file (conn['dbf']) is in use, exclude 'dbf' and retry to
     connect to an already-running database. This only works if params['dbn']
@@ -33,58 +210,119 @@ def db_exec(
 
     :param conn: A SQLAnywhereConn object or equivalent dict
     :param sql: A single or list of SQL statements to run
+    :param columnar: Return a single result as columns instead of rows
     :return: dict or list of dicts, depending on the provided sql
     """
 
     if type(conn) is SQLAnywhereConn:
         conn = conn.to_dict()
 
-    cursor = None
     try:
-        connection = pyodbc.connect(**conn)
-        cursor = connection.cursor()
-
-        if isinstance(sql, str):
-            results = []
-            cursor.execute(sql)
-            columns = [col[0] for col in cursor.description]
-            for row in cursor.fetchall():
-                res = dict(zip(columns, row))
-                results.append(res)
-            # return {'rowcount': int(cursor.rowcount), 'data': results}
-            return results
-
-        if isinstance(sql, list):
-            multi = []
-            for s in sql:
-                results = []
-                cursor.execute(s)
-                columns = [col[0] for col in cursor.description]
-                for row in cursor.fetchall():
-                    res = dict(zip(columns, row))
-                    results.append(res)
-                multi.append(results)
-
-                # multi.append({
-                #     'rowcount': int(cursor.rowcount),
-                #     'data': results
-                # })
-
-            return multi
+        with sqla_conn(conn) as connection, closing(connection.cursor()) as cursor:
+            return run_sql(cursor, sql, columnar)
     except pyodbc.OperationalError as oe:
         if re.search(r"Database name not unique", str(oe)):
             logger.exception(oe)
+            sqla_cache.invalidate(conn)
             conn.pop("dbf")
             raise RetryException from oe
     except Exception as ex:
         logger.exception(ex)
         raise ex
 
-    finally:
-        if cursor:
-            cursor.close()
-        # if connection:
-        #     connection.close()
+
+def db_stream(
+    conn: dict | SQLAnywhereConn,
+    sql: str,
+    size: int = DB_FETCH_SIZE,
+    columnar: bool = False,
+) -> Iterator[List[Dict[str, Any]] | Dict[str, list]]:
+    """
+    Streaming variant of db_exec for a single SQL statement. Rows are fetched
+    with fetchmany and yielded in blocks of (at most) size rows, so only one
+    block is held in memory at a time. The cached connection is held until the
+    generator is exhausted or closed.
+    :param conn: A SQLAnywhereConn object or equivalent dict
+    :param sql: A single SQL statement
+    :param size: Number of rows per block
+    :param columnar: Yield each block as columns (see db_exec) instead of rows
+    :return: generator of row blocks (list of dicts) or column dicts
+    """
+    if type(conn) is SQLAnywhereConn:
+        conn = conn.to_dict()
+
+    started = False
+    tries = 5
+    for attempt in range(tries):
+        try:
+            with sqla_conn(conn) as connection, closing(connection.cursor()) as cur:
+                cur.execute(sql)
+                columns = [col[0] for col in cur.description]
+                while True:
+                    rows = cur.fetchmany(size)
+                    if not rows:
+                        return
+                    started = True
+                    if columnar:
+                        yield {c: list(v) for c, v in zip(columns, zip(*rows))}
+                    else:
+                        yield [dict(zip(columns, row)) for row in rows]
+        except pyodbc.OperationalError as oe:
+            # same "already running" retry as db_exec, only before any rows
+            if not started and re.search(r"Database name not unique", str(oe)):
+                logger.exception(oe)
+                sqla_cache.invalidate(conn)
+                conn.pop("dbf", None)
+                if attempt < tries - 1:
+                    continue
+                # out of attempts: fail like db_exec does, never end "empty"
+                raise RetryException from oe
+            logger.exception(oe)
+            raise oe
+
+
+def run_sql(cursor, sql: List[str] or str, columnar: bool = False):
+    """
+    The query part of db_exec, on an already open cursor. See db_exec.
+    :param cursor: A pyodbc cursor
+    :param sql: A single or list of SQL statements to run
+    :param columnar: Return a single result as columns instead of rows
+    :return: dict or list of dicts, depending on the provided sql
+    """
+    if isinstance(sql, str) and columnar:
+        cursor.execute(sql)
+        columns = [col[0] for col in cursor.description]
+        rows = cursor.fetchall()
+        values = zip(*rows) if rows else [()] * len(columns)
+        return {c: list(v) for c, v in zip(columns, values)}
+
+    if isinstance(sql, str):
+        results = []
+        cursor.execute(sql)
+        columns = [col[0] for col in cursor.description]
+        for row in cursor.fetchall():
+            res = dict(zip(columns, row))
+            results.append(res)
+        # return {'rowcount': int(cursor.rowcount), 'data': results}
+        return results
+
+    if isinstance(sql, list):
+        multi = []
+        for s in sql:
+            results = []
+            cursor.execute(s)
+            columns = [col[0] for col in cursor.description]
+            for row in cursor.fetchall():
+                res = dict(zip(columns, row))
+                results.append(res)
+            multi.append(results)
+
+            # multi.append({
+            #     'rowcount': int(cursor.rowcount),
+            #     'data': results
+            # })
+
+        return multi
 
 
 def make_conn_params(repo_path: str, host: str) -> dict:
@@ -1,45 +1,68 @@
-import re
-from retry import retry
-from common.logger import Logger
-from common.util import RetryException
-from typing import Optional
-
-logger = Logger(__name__)
+from common.util import hostname
+from typing import List, Optional
 
 
 class TaskManager:
     def __init__(self, sb_client):
         self.sb_client = sb_client
 
-    @retry(RetryException, tries=2)
     def manage_task(self, task_id: int, status: Optional[str] = None) -> None:
         """
         We use the supabase task table with realtime as a queue. This method
         updates the task status and (later) deletes it
-        This is the first method called after receiving a task, so we add retry
-        for expired sessions.
         :param task_id: An autoincrement int from supabase
         :param status: PENDING, PROCESSING or FAILED. see is_valid_status()
         :return: None
         """
-        try:
-            if status is None:
-                self.sb_client.table("task").delete().eq("id", task_id).execute()
-            elif status in ("PROCESSING", "FAILED"):
-                (
-                    self.sb_client.table("task")
-                    .update({"status": status})
-                    .eq("id", task_id)
-                    .execute()
-                )
-        except Exception as err:
-            if re.search("JWT expired", str(err)):
-                print(err)
-                logger.warning("Session JWT expired. Retrying after sign-in...")
-                self.sb_client.sign_in()
-                raise RetryException from err
-            else:
-                raise err
+        if status is None:
+            self.sb_client.table("task").delete().eq("id", task_id).execute()
+        elif status in ("PROCESSING", "FAILED"):
+            (
+                self.sb_client.table("task")
+                .update({"status": status})
+                .eq("id", task_id)
+                .execute()
+            )
+
+    def claim_task(self, task_id: int) -> bool:
+        """
+        Atomically take a PENDING task: the update only matches while the task
+        is still PENDING, so when several workers (or duplicate realtime
+        events) race for the same task, exactly one gets the row back.
+        The claimed task is readdressed to this host.
+        :param task_id: An autoincrement int from supabase
+        :return: True if this worker now owns the task
+        """
+        res = (
+            self.sb_client.table("task")
+            .update({"status": "PROCESSING", "worker": hostname()})
+            .eq("id", task_id)
+            .eq("status", "PENDING")
+            .execute()
+        )
+        return len(res.data) > 0
+
+    def pending_tasks(
+        self, workers: List[str], limit: int, after_id: Optional[int] = None
+    ) -> List[dict]:
+        """
+        Fetch PENDING tasks for the given workers, oldest first. Page through
+        by passing the last id seen as after_id.
+        :param workers: Worker names (hostname and/or pool) the tasks are for
+        :param limit: Max rows to return
+        :param after_id: Only return tasks with a greater id
+        :return: list of task rows
+        """
+        query = (
+            self.sb_client.table("task")
+            .select("*")
+            .eq("status", "PENDING")
+            .in_("worker", workers)
+        )
+        if after_id is not None:
+            query = query.gt("id", after_id)
+        res = query.order("id").limit(limit).execute()
+        return res.data
 
     def manage_asset_batch(self, task_id, batch_id, status=None) -> None:
         """
@@ -1,5 +1,5 @@
 import re
-from common.util import hostname, SUITE
+from common.util import hostname, worker_pool, SUITE
 from dataclasses import dataclass, field, asdict
 from typing import Dict, List, Any, Optional
 
@@ -116,6 +116,7 @@ class ReconTaskBody:
     ggx_host: str
     recon_root: str
     suite: str
+    force: bool = False
 
     def to_dict(self):
         return asdict(self)
@@ -313,7 +314,7 @@ def validate_task(payload: dict):
                 raise Exception("Unexpected status in payload")
 
             if (
-                payload["record"]["worker"] == hostname()
+                payload["record"]["worker"] in (hostname(), worker_pool())
                 and payload["record"]["status"] == "PENDING"
                 and (
                     (
@@ -46,6 +46,15 @@ def hostname() -> str:
     return socket.gethostname().lower()
 
 
+def worker_pool() -> str:
+    """
+    Tasks addressed to this pool (WORKER_POOL in .env) can be claimed by any
+    worker in it. Defaults to the hostname, i.e. a pool of one.
+    :return: A lowercase pool name
+    """
+    return (os.environ.get("WORKER_POOL") or hostname()).lower()
+
+
 def hashify(s: str) -> str:
     """
     Return an MD5 hash on any string
@@ -7,21 +7,32 @@ from dotenv import load_dotenv
 from asset.batcher import batcher
 from asset.loader import loader
 
-from common.sb_client import SupabaseClient
-from common.messenger import Messenger
+from common.sb_client import get_sb_client
+from common.pg_pool import close_pg_pool, pg_pool_stats
 from common.queue_manager import QueueManager
+from common.seen_tasks import SeenTasks
+from common.sqlanywhere import sqla_cache
 from common.task_manager import TaskManager
 from common.typeish import validate_task, validate_repo, Repo
-from common.util import init_socket, hostname, SUITE
+from common.util import init_socket, hostname, worker_pool, SUITE
 from recon.recon import repo_recon
 from search.search import search_local_pg, query_to_file
 from common.logger import Logger
 
-from typing import Any, Callable, Dict, List
+from typing import Any, Callable, Dict
 
 load_dotenv()
 logger = Logger(__name__)
 
+# seconds between polls for PENDING tasks missed by realtime (0 disables)
+TASK_POLL_SECONDS = int(os.environ.get("TASK_POLL_SECONDS") or 60)
+
+# PENDING tasks fetched per request while polling
+TASK_POLL_LIMIT = int(os.environ.get("TASK_POLL_LIMIT") or 100)
+
+# seconds between logging queue, pool and messenger stats (0 disables)
+WORKER_STATS_SECONDS = int(os.environ.get("WORKER_STATS_SECONDS") or 300)
+
 
 def handle_export(task):
     """
@@ -42,9 +53,8 @@ class PurrWorker:
     """
 
     def __init__(self) -> None:
-        self.sb_client = SupabaseClient()
+        self.sb_client = get_sb_client()
         self.task_manager = TaskManager(self.sb_client)
-        self.messenger = Messenger(self.sb_client)
 
         work_max_workers = int(os.environ.get("WORK_MAX_WORKERS"))
         self.work_queue = QueueManager(work_max_workers)
@@ -61,8 +71,10 @@ class PurrWorker:
             args=(self.task_handler,),
             daemon=True,
         )
+        self.seen_tasks = SeenTasks()
         self.socket = init_socket()
         self.running = True
+        self.stopped = threading.Event()
 
         logger.info(f"PurrWorker ({SUITE}) initialized...")
 
@@ -87,14 +99,14 @@ class PurrWorker:
         self.work_queue.stop()
         self.search_queue.stop()
 
-    def add_to_work_queue(self, task) -> None:
-        self.work_queue.add_task(task)
+    def add_to_work_queue(self, task) -> bool:
+        return self.work_queue.add_task(task)
 
     def process_work_queue(self) -> None:
         self.work_queue.process_queue(self.task_handler)
 
-    def add_to_search_queue(self, task) -> None:
-        self.search_queue.add_task(task)
+    def add_to_search_queue(self, task) -> bool:
+        return self.search_queue.add_task(task)
 
     def process_search_queue(self) -> None:
         self.search_queue.process_queue(self.task_handler)
@@ -103,10 +115,16 @@ class PurrWorker:
 
     def halt(self) -> None:
         """
-        Stop queues, sign out of Supbase and shut down
+        Stop queues, send any queued messages, sign out of Supbase and shut down
         :return: None
         """
+        self.running = False
+        self.stopped.set()
         self.stop_queue_processing()
+        self.log_stats()
+        close_pg_pool()
+        sqla_cache.close_all()
+        logger.messenger.close()
         self.sb_client.sign_out()
         sys.exit()
 
@@ -126,7 +144,8 @@ class PurrWorker:
         """
         This task initiates asset collection by first counting the number of
         records, then creating (enqueueing) several loader tasks based on the
-        chunk size. Fewer, larger chunks are faster, but risk memory problems.
+        chunk size. Fewer, larger chunks are faster. Loaders stream each chunk
+        in LOADER_FETCH_SIZE blocks, so chunk size no longer bounds memory.
         See comments in code.
         :param task: An instance of BatcherTask
         :return: TODO
@@ -228,21 +247,20 @@ class PurrWorker:
         # 0. notify client of job/task start
         logger.send_message(directive="busy", data={"job_id": task.id})
 
-        # 1. run repo_recon (returned as dicts for supabase)
-        repos: List[Dict[str, Any]] = repo_recon(task.body)
-
-        # 2. write repos to repo table
-        self.sb_client.table("repo").upsert(repos).execute()
+        # 1. run repo_recon; 2. write each repo to the repo table as it finishes
+        def upsert_repo(repo: Dict[str, Any]) -> None:
+            self.sb_client.table("repo").upsert(repo).execute()
 
-        # 3. send message
-        for repo in repos:
+            # 3. send message
             logger.send_message(
                 directive="note",
                 repo_id=repo["id"],
-                data={"note": f"added repo: {repo["fs_path"]}"},
+                data={"note": f"added repo: {repo['fs_path']}"},
                 workflow="recon",
             )
 
+        repo_recon(task.body, on_repo=upsert_repo)
+
         # 4. notify client of job/task end
         logger.send_message(directive="done", data={"job_id": task.id})
 
@@ -272,51 +290,142 @@ class PurrWorker:
 
     # @auto_log
     def task_handler(self, task):
+        try:
+            task_handlers = {
+                "batcher": self.handle_batcher,
+                "loader": self.handle_loader,
+                "recon": self.handle_recon,
+                "search": self.handle_search,
+                "export": handle_export,
+                # "stats": self.handle_stats,
+                # "halt": self.halt,
+            }
 
-        task_handlers = {
-            "batcher": self.handle_batcher,
-            "loader": self.handle_loader,
-            "recon": self.handle_recon,
-            "search": self.handle_search,
-            "export": handle_export,
-            # "stats": self.handle_stats,
-            # "halt": self.halt,
-        }
-
-        self.task_manager.manage_task(task.id, "PROCESSING")
-
-        # TODO: revisit typing here
-        handler: Callable[[Any], None] = task_handlers.get(task.directive)
-
-        if task.directive == "halt":
-            self.halt()
-        elif handler:
+            if not self.task_manager.claim_task(task.id):
+                logger.debug(f"{task.directive} task {task.id} claimed elsewhere")
+                return
+
+            # TODO: revisit typing here
+            handler: Callable[[Any], None] = task_handlers.get(task.directive)
+
+            if task.directive == "halt":
+                self.halt()
+            elif handler:
+                try:
+                    handler(task)
+                except Exception as error:
+                    logger.exception(error)
+                finally:
+                    # probably needless cleanup
+                    self.task_manager.manage_task(task.id)
+            #
+            # else:
+            #     print(f"Unknown task directive: {task.directive}")
+        finally:
+            # duplicates of this task can be dropped for a while longer
+            self.seen_tasks.done(task.id, task.status)
+
+    def pluck(self, payload) -> None:
+        """
+        Validate a task payload (a realtime event or a polled row wrapped as
+        {"record": row}) and queue it, unless it's a duplicate
+        :param payload: dict with the task row under "record"
+        :return: None
+        """
+        task = validate_task(payload)
+
+        if task:
+            # INSERT and UPDATE events (and polls) can all deliver the same task
+            if not self.seen_tasks.add(task.id, task.status):
+                logger.debug(f"dropped duplicate event for task {task.id}")
+                return
+
+            logger.debug(f"plucked {task.directive} task from queue")
+            if task.directive == "search" or task.directive == "export":
+                queued = self.add_to_search_queue(task)
+            else:
+                queued = self.add_to_work_queue(task)
+            if not queued:
+                self.seen_tasks.forget(task.id, task.status)
+                logger.debug(f"queue full, left {task.directive} task pending")
+
+    def sweep_pending(self) -> int:
+        """
+        Feed PENDING tasks addressed to this host (or its pool) through pluck,
+        TASK_POLL_LIMIT rows at a time. This picks up tasks inserted while the
+        worker was down or the socket was reconnecting.
+        :return: Number of rows fetched
+        """
+        workers = list({hostname(), worker_pool()})
+        fetched = 0
+        after_id = None
+        while self.running:
+            rows = self.task_manager.pending_tasks(workers, TASK_POLL_LIMIT, after_id)
+            for row in rows:
+                self.pluck({"record": row})
+            fetched += len(rows)
+            if len(rows) < TASK_POLL_LIMIT:
+                break
+            after_id = rows[-1]["id"]
+        return fetched
+
+    def poll_pending(self) -> None:
+        """
+        Sweep for PENDING tasks every TASK_POLL_SECONDS until halted
+        """
+        while not self.stopped.wait(TASK_POLL_SECONDS):
             try:
-                handler(task)
+                fetched = self.sweep_pending()
+                if fetched:
+                    logger.debug(f"polled {fetched} pending tasks")
             except Exception as error:
                 logger.exception(error)
-            finally:
-                # probably needless cleanup
-                self.task_manager.manage_task(task.id)
-        #
-        # else:
-        #     print(f"Unknown task directive: {task.directive}")
+
+    def stats(self) -> dict:
+        """
+        Queue depths and wait times, connection pools, message delivery and
+        dropped duplicate task events, for monitoring
+        :return: dict of stats by component
+        """
+        return {
+            "work_queue": self.work_queue.stats(),
+            "search_queue": self.search_queue.stats(),
+            "pg_pool": pg_pool_stats(),
+            "sqla_cache": sqla_cache.stats(),
+            "messenger": logger.messenger.stats(),
+            "seen_tasks": self.seen_tasks.stats(),
+        }
+
+    def log_stats(self) -> None:
+        try:
+            logger.info(f"worker stats: {json.dumps(self.stats())}")
+        except Exception as error:
+            logger.exception(error)
+
+    def report_stats(self) -> None:
+        """
+        Log stats every WORKER_STATS_SECONDS until halted
+        """
+        while not self.stopped.wait(WORKER_STATS_SECONDS):
+            self.log_stats()
 
     def listen(self) -> None:
         self.socket.connect()
         channel = self.socket.set_channel("realtime:public:task")
 
-        def pluck(payload):
-            task = validate_task(payload)
+        channel.join().on("INSERT", self.pluck)
+        channel.join().on("UPDATE", self.pluck)
+
+        # catch up on anything that arrived while we were down
+        try:
+            logger.info(f"startup sweep found {self.sweep_pending()} pending tasks")
+        except Exception as error:
+            logger.exception(error)
 
-            if task:
-                logger.debug(f"plucked {task.directive} task from queue")
-                if task.directive == "search" or task.directive == "export":
-                    self.add_to_search_queue(task)
-                else:
-                    self.add_to_work_queue(task)
+        if TASK_POLL_SECONDS > 0:
+            threading.Thread(target=self.poll_pending, daemon=True).start()
 
-        channel.join().on("INSERT", pluck)
-        channel.join().on("UPDATE", pluck)
+        if WORKER_STATS_SECONDS > 0:
+            threading.Thread(target=self.report_stats, daemon=True).start()
 
         self.socket.listen()
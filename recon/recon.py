@@ -1,16 +1,239 @@
-from recon.repo_fs import glob_repos, dir_stats, repo_mod
-from recon.repo_db import well_counts, hull_outline
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError
+from dotenv import load_dotenv
+from recon.repo_fs import glob_repos, dir_stats
+from recon.repo_db import well_counts, hull_outline, data_stamp
 from recon.epsg import epsg_codes
+from recon.repo_cache import ReconCache, repo_fingerprint
+from common.logger import Logger
+from common.sqlanywhere import QUERY_TIMEOUT
 from common.util import normalize_path
 from common.typeish import validate_repo
-from typing import Dict, List, Any
+from typing import Callable, Dict, List, Any, Optional
 
 # from common.debugger import debugger
 
+load_dotenv()
+logger = Logger(__name__)
 
-def repo_recon(body) -> List[Dict[str, Any]]:
+# repos processed at once
+RECON_MAX_WORKERS = int(os.environ.get("RECON_MAX_WORKERS") or 8)
+
+# repos queried at once on any one SQLAnywhere server
+RECON_DB_PER_SERVER = int(os.environ.get("RECON_DB_PER_SERVER") or 2)
+
+# seconds a stage may run (counted from when it starts, not from when it was
+# queued behind other repos' stages) before giving up on the repo
+STAGE_TIMEOUTS = {
+    "data_stamp": 120,
+    "well_counts": 600,
+    "hull_outline": 600,
+    "epsg_codes": 60,
+    "dir_stats": 1800,
+}
+
+# seconds a stage may wait for a thread and (database stages) a server slot
+# before giving up on the repo
+RECON_SLOT_SECONDS = int(os.environ.get("RECON_SLOT_SECONDS") or 3600)
+
+DB_STAGES = [well_counts, hull_outline]
+FS_STAGES = [epsg_codes, dir_stats]
+
+# stages skipped for unchanged repos (see ReconCache)
+EXPENSIVE_STAGES = {"well_counts", "hull_outline", "dir_stats"}
+
+
+class ServerSlots:
+    """
+    Limit concurrent database stages per SQLAnywhere server
+    """
+
+    def __init__(self, per_server: int):
+        self.per_server = per_server
+        self.lock = threading.Lock()
+        self.slots = {}
+
+    def get(self, server: str) -> threading.BoundedSemaphore:
+        with self.lock:
+            if server not in self.slots:
+                self.slots[server] = threading.BoundedSemaphore(self.per_server)
+            return self.slots[server]
+
+
+class SlotLease:
+    """
+    A server slot taken by one database stage. It is given back once: when
+    the stage returns, or when recon gives up on the stage (i.e. it timed
+    out), so a hung stage can't hold its server's slot forever.
+    """
+
+    def __init__(self, slot: threading.BoundedSemaphore):
+        self.slot = slot
+        self.lock = threading.Lock()
+        self.held = False
+
+    def acquire(self, timeout: float) -> bool:
+        if not self.slot.acquire(timeout=timeout):
+            return False
+        with self.lock:
+            self.held = True
+        return True
+
+    def release(self) -> None:
+        with self.lock:
+            held, self.held = self.held, False
+        if held:
+            self.slot.release()
+
+
+def run_stage(func, repo_base, lease, started: dict, failed: threading.Event):
+    """
+    Run one stage in the stage pool. Database stages first wait (up to
+    RECON_SLOT_SECONDS) for their server slot, and their statements are
+    cancelled by SQLAnywhere after the stage's timeout. The stage's start time
+    is recorded once it has a slot, and the stage is skipped if its repo
+    failed in the meantime.
+    :param func: The stage function
+    :param repo_base: A stub repo dict from glob_repos
+    :param lease: A SlotLease on the server (database stages) or None
+    :param started: Start times (monotonic) by stage name, filled in here
+    :param failed: Set once the repo has failed
+    :return: the stage's metadata, or None if skipped
+    """
+    name = func.__name__
+    if lease is None:
+        if failed.is_set():
+            return None
+        started[name] = time.monotonic()
+        return func(repo_base)
+
+    if not lease.acquire(timeout=RECON_SLOT_SECONDS):
+        raise TimeoutError(f"no free slot for {name} @ {repo_base['fs_path']}")
+    try:
+        if failed.is_set():
+            return None
+        conn = {**repo_base["conn"], QUERY_TIMEOUT: STAGE_TIMEOUTS[name]}
+        started[name] = time.monotonic()
+        return func({**repo_base, "conn": conn})
+    finally:
+        lease.release()
+
+
+def stage_result(name, future, started: dict, submitted: float, repo_base) -> dict:
+    """
+    Wait (up to RECON_SLOT_SECONDS) for a stage to start, then for at most
+    STAGE_TIMEOUTS[name] seconds from its start
+    """
+    while name not in started and not future.done():
+        if time.monotonic() - submitted > RECON_SLOT_SECONDS:
+            raise TimeoutError(f"{name} never started @ {repo_base['fs_path']}")
+        time.sleep(0.1)
+    if name in started:
+        deadline = started[name] + STAGE_TIMEOUTS[name]
+        timeout = max(deadline - time.monotonic(), 0)
+    else:
+        timeout = None
+    try:
+        return future.result(timeout=timeout)
+    except TimeoutError as te:
+        raise TimeoutError(f"{name} timed out @ {repo_base['fs_path']}") from te
+
+
+def recon_one(repo_base, stage_pool, server_slots, cache, force) -> Dict[str, Any]:
     """
+    Run every metadata stage for one repo. Filesystem stages go straight to the
+    stage pool; database stages also wait for a slot on their server.
+    A quick data_stamp stage runs first. Unless forced, the expensive stages
+    are then skipped for repos whose fingerprint matches the recon cache, and
+    their previous metadata is reused.
+    Stages run concurrently and each is timed from its own start, so waiting
+    for a busy server doesn't count against it (that wait has its own limit,
+    RECON_SLOT_SECONDS). A stage that times out (or fails) fails the repo,
+    its stages that haven't started are dropped, and its server slots are
+    given back. A timed-out stage's thread can't be killed, but its database
+    statement is cancelled by the query timeout.
+    :param repo_base: A stub repo dict from glob_repos
+    :param stage_pool: ThreadPoolExecutor shared by all stages
+    :param server_slots: ServerSlots for database stages
+    :param cache: ReconCache
+    :param force: Ignore the cache and run every stage
+    :return: a validated Repo as a dict
+    """
+    server_slot = server_slots.get(repo_base["conn"].get("server"))
+    started = {}
+    failed = threading.Event()
+    leases = []
+    futures = {}
+
+    def submit(func, db: bool):
+        lease = SlotLease(server_slot) if db else None
+        if lease:
+            leases.append(lease)
+        futures[func.__name__] = stage_pool.submit(
+            run_stage, func, repo_base, lease, started, failed
+        )
+
+    expensive_md = {}
+    try:
+        submitted = time.monotonic()
+        submit(data_stamp, db=True)
+        stamp = stage_result(
+            "data_stamp", futures["data_stamp"], started, submitted, repo_base
+        )
+        fingerprint = repo_fingerprint(repo_base, stamp)
+
+        # without a data stamp we can't tell if the repo changed
+        cached = None
+        if stamp and not force:
+            cached = cache.lookup(repo_base["id"], fingerprint)
+        if cached:
+            logger.info(
+                f"repo unchanged, reusing recon metadata: {repo_base['fs_path']}"
+            )
+            repo_base.update(cached)
+
+        def wanted(func):
+            return not (cached and func.__name__ in EXPENSIVE_STAGES)
+
+        submitted = time.monotonic()
+        for func in filter(wanted, DB_STAGES):
+            submit(func, db=True)
+        for func in filter(wanted, FS_STAGES):
+            submit(func, db=False)
+
+        for name, future in futures.items():
+            if name == "data_stamp":
+                continue
+            md = stage_result(name, future, started, submitted, repo_base)
+            repo_base.update(md)
+            if name in EXPENSIVE_STAGES:
+                expensive_md.update(md)
+    except Exception:
+        failed.set()
+        for future in futures.values():
+            future.cancel()
+        for lease in leases:
+            lease.release()
+        raise
+
+    if stamp and not cached:
+        cache.store(repo_base["id"], fingerprint, expensive_md)
+
+    return validate_repo(repo_base).to_dict()
+
+
+def repo_recon(
+    body, on_repo: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Discover repos, then collect their metadata concurrently (bounded by
+    RECON_MAX_WORKERS and RECON_DB_PER_SERVER). Each repo is handed to on_repo
+    as soon as it finishes, so results can be written as the crawl proceeds.
+    Unchanged repos reuse cached metadata unless body.force is set.
     :param body: A ReconTaskBody
+    :param on_repo: Optional callback for each finished (valid) repo dict
     :return: A list of valid Repo classes having all expected Repo elements.
     Repo classes are turned back to dicts since they are going into supabase.
     """
@@ -18,35 +241,48 @@ def repo_recon(body) -> List[Dict[str, Any]]:
 
     repos = glob_repos(fs_path)
 
-    for repo_base in repos:
-        for func in [
-            well_counts,
-            hull_outline,
-            epsg_codes,
-            dir_stats,
-            repo_mod,
-        ]:
-            md = func(repo_base)
-            repo_base.update(md)
+    server_slots = ServerSlots(RECON_DB_PER_SERVER)
+    cache = ReconCache()
+    stage_workers = RECON_MAX_WORKERS * (len(DB_STAGES) + len(FS_STAGES))
 
-    validated_repo_dicts = [validate_repo(r).to_dict() for r in repos]
-    return validated_repo_dicts
+    validated_repo_dicts = []
 
+    # don't wait on stuck (timed-out) stages when the crawl is done
+    stage_pool = ThreadPoolExecutor(max_workers=stage_workers)
 
-"""
-import asyncio
+    with ThreadPoolExecutor(max_workers=RECON_MAX_WORKERS) as repo_pool:
+        futures = {
+            repo_pool.submit(
+                recon_one, repo_base, stage_pool, server_slots, cache, body.force
+            ): repo_base
+            for repo_base in repos
+        }
+        for future in as_completed(futures):
+            repo_base = futures[future]
+            try:
+                repo_dict = future.result()
+            except Exception as error:
+                logger.send_message(
+                    directive="note",
+                    repo_id=repo_base["id"],
+                    data={"note": f"recon failed: {error}"},
+                    workflow="recon",
+                )
+                continue
 
-async def process_repo(repo):
-    for func in [well_counts, epsg_codes, dir_stats, repo_last_mod]:
-        md = await func(repo)
-        repo.update(md)
+            validated_repo_dicts.append(repo_dict)
+            if on_repo:
+                # one repo that can't be saved shouldn't end the crawl
+                try:
+                    on_repo(repo_dict)
+                except Exception as error:
+                    logger.exception(error)
+                    logger.send_message(
+                        directive="note",
+                        repo_id=repo_base["id"],
+                        data={"note": f"recon could not save repo: {error}"},
+                        workflow="recon",
+                    )
 
-async def main():
-    tasks = []
-    for repo in repos:
-        tasks.append(asyncio.create_task(process_repo(repo)))
-    await asyncio.gather(*tasks)
-
-if __name__ == "__main__":
-    asyncio.run(main())
-"""
+    stage_pool.shutdown(wait=False, cancel_futures=True)
+    return validated_repo_dicts
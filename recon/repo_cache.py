@@ -0,0 +1,109 @@
+import os
+import threading
+import simplejson as json
+from dotenv import load_dotenv
+from common.logger import Logger
+from recon.repo_fs import GXDB_FILES
+from typing import Optional
+
+load_dotenv()
+logger = Logger(__name__)
+
+# the recon cache lives here, not in the working directory
+RECON_CACHE_DIR = os.environ.get("RECON_CACHE_DIR") or "cache"
+RECON_CACHE = os.path.join(RECON_CACHE_DIR, "recon_cache.json")
+
+
+def file_stamp(fs_path: str) -> Optional[list]:
+    """
+    :param fs_path: Any file path
+    :return: [mtime, size] or None if missing
+    """
+    try:
+        st = os.stat(fs_path)
+        return [st.st_mtime, st.st_size]
+    except OSError:
+        return None
+
+
+def project_stamps(fs_path: str) -> dict:
+    """
+    Stamp the files and folders at the top of a project, skipping the
+    SQLAnywhere files (see GXDB_FILES)
+    :param fs_path: The project folder
+    :return: dict of name to [mtime, size]
+    """
+    stamps = {}
+    try:
+        with os.scandir(fs_path) as it:
+            for entry in it:
+                if entry.name in GXDB_FILES:
+                    continue
+                stamps[entry.name] = file_stamp(entry.path)
+    except OSError as error:
+        logger.warning(f"cannot stamp {fs_path}: {error}")
+    return stamps
+
+
+def repo_fingerprint(repo_base, data_stamp: dict) -> dict:
+    """
+    Cheap stats that change when a project is modified. gxdb.db itself is no
+    use: recon's own connections (and the database's autostop checkpoint)
+    rewrite it. Instead we ask the database when each counted table last
+    changed (see repo_db.data_stamp) and stamp the top-level project files.
+    Note that the file stamps only notice files added, removed or changed at
+    the top of the project; changes deeper down leave the cached dir_stats
+    (files, bytes, repo_mod) as they were until a forced recon.
+    :param repo_base: A stub repo dict. We just use the fs_path
+    :param data_stamp: Row counts and latest row_changed_dates
+    :return: dict of stamps
+    """
+    return {
+        "files": project_stamps(repo_base["fs_path"]),
+        "data": data_stamp,
+    }
+
+
+class ReconCache:
+    """
+    Persisted repo metadata from earlier recon runs, keyed by repo id (i.e.
+    hashify(fs_path)). If a repo's fingerprint hasn't changed, the expensive
+    recon stages can reuse the previous metadata.
+    """
+
+    def __init__(self, cache_file: str = RECON_CACHE):
+        self.cache_file = cache_file
+        self.lock = threading.Lock()
+        self.entries = {}
+        try:
+            with open(cache_file) as f:
+                self.entries = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, json.JSONDecodeError) as error:
+            logger.warning(f"ignoring unreadable recon cache {cache_file}: {error}")
+
+    def lookup(self, repo_id: str, fingerprint: dict) -> Optional[dict]:
+        """
+        :return: previous metadata if the fingerprint matches, else None
+        """
+        with self.lock:
+            entry = self.entries.get(repo_id)
+        if entry and entry.get("fingerprint") == fingerprint:
+            return entry.get("metadata")
+        return None
+
+    def store(self, repo_id: str, fingerprint: dict, metadata: dict) -> None:
+        """
+        Save a repo's metadata and rewrite the cache file (atomically)
+        """
+        with self.lock:
+            self.entries[repo_id] = {"fingerprint": fingerprint, "metadata": metadata}
+            tmp_file = f"{self.cache_file}.tmp"
+            try:
+                os.makedirs(os.path.dirname(self.cache_file) or ".", exist_ok=True)
+                with open(tmp_file, "w") as f:
+                    json.dump(self.entries, f)
+                os.replace(tmp_file, self.cache_file)
+            except OSError as error:
+                logger.warning(f"could not write recon cache: {error}")
@@ -1,6 +1,11 @@
-from common.sqlanywhere import db_exec
+import os
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from common.sqlanywhere import db_exec, db_stream, SQLA_MAX_PER_REPO
 from common.logger import Logger
 from concave_hull import concave_hull
+from dotenv import load_dotenv
+from typing import Optional
 
 # from common.debugger import debugger
 
@@ -9,6 +14,30 @@ NOTNULL_LONLAT = (
     "WHERE surface_longitude IS NOT NULL and surface_latitude IS NOT NULL"
 )
 
+# every table behind the well counts and hull outline. A change to any of
+# them (not just to gxdb.db) invalidates cached recon metadata.
+STAMP_TABLES = [
+    "well",
+    "well_completion",
+    "well_core",
+    "well_test",
+    "well_formation",
+    "well_perforation",
+    "well_cumulative_production",
+    "log_image_reg_log_section",
+    "well_dir_srvy_station",
+    "well_dir_proposed_srvy_station",
+    "gx_well_curve",
+    "well_zone_interval",
+]
+
+# row count and latest row_changed_date of each table, in one round trip
+DATA_STAMP = "SELECT * FROM " + ", ".join(
+    f"( SELECT COUNT(*) AS {t}_rows, MAX(row_changed_date) AS {t}_changed "
+    f"FROM {t} ) s{i}"
+    for i, t in enumerate(STAMP_TABLES)
+)
+
 HULL_CONCAVITY = 2
 
 ##########
@@ -62,15 +91,90 @@ WELLS_WITH_VECTOR_LOG = "SELECT COUNT(DISTINCT wellid) AS tally FROM gx_well_cur
 
 WELLS_WITH_ZONE = "SELECT COUNT(DISTINCT uwi) AS tally FROM well_zone_interval"
 
+# All twelve tallies in one round trip: each derived table is a single-row
+# aggregate, and well_test is scanned once for both DST and IP.
+WELL_COUNTS = (
+    "SELECT * FROM "
+    "( SELECT COUNT(uwi) AS well_count FROM well ) a, "
+    "( SELECT COUNT(DISTINCT uwi) AS wells_with_completion "
+    "FROM well_completion ) b, "
+    "( SELECT COUNT(DISTINCT uwi) AS wells_with_core FROM well_core ) c, "
+    "( SELECT "
+    "COUNT(DISTINCT CASE WHEN test_type = 'DST' THEN uwi END) AS wells_with_dst, "
+    "COUNT(DISTINCT CASE WHEN test_type = 'IP' THEN uwi END) AS wells_with_ip "
+    "FROM well_test WHERE test_type IN ('DST', 'IP') ) d, "
+    "( SELECT COUNT(DISTINCT uwi) AS wells_with_formation "
+    "FROM well_formation ) e, "
+    "( SELECT COUNT(DISTINCT uwi) AS wells_with_perforation "
+    "FROM well_perforation ) f, "
+    "( SELECT COUNT(DISTINCT uwi) AS wells_with_production "
+    "FROM well_cumulative_production ) g, "
+    "( SELECT COUNT(DISTINCT(w.uwi)) AS wells_with_raster_log FROM well w "
+    "JOIN log_image_reg_log_section r ON r.well_id = w.uwi ) h, "
+    "( SELECT COUNT(DISTINCT uwi) AS wells_with_survey FROM ( "
+    "SELECT uwi FROM well_dir_srvy_station "
+    "UNION "
+    "SELECT uwi FROM well_dir_proposed_srvy_station "
+    ") x ) i, "
+    "( SELECT COUNT(DISTINCT wellid) AS wells_with_vector_log "
+    "FROM gx_well_curve ) j, "
+    "( SELECT COUNT(DISTINCT uwi) AS wells_with_zone FROM well_zone_interval ) k"
+)
+
+COUNTER_SQL = {
+    "well_count": WELLS,
+    "wells_with_completion": WELLS_WITH_COMPLETION,
+    "wells_with_core": WELLS_WITH_CORE,
+    "wells_with_dst": WELLS_WITH_DST,
+    "wells_with_formation": WELLS_WITH_FORMATION,
+    "wells_with_ip": WELLS_WITH_IP,
+    "wells_with_perforation": WELLS_WITH_PERFORATION,
+    "wells_with_production": WELLS_WITH_PRODUCTION,
+    "wells_with_raster_log": WELLS_WITH_RASTER_LOG,
+    "wells_with_survey": WELLS_WITH_SURVEY,
+    "wells_with_vector_log": WELLS_WITH_VECTOR_LOG,
+    "wells_with_zone": WELLS_WITH_ZONE,
+}
+
+load_dotenv()
+
+# set RECON_PARALLEL_COUNTS=true in .env to run the separate counts over
+# parallel connections (for projects where the combined plan is slower)
+RECON_PARALLEL_COUNTS = os.environ.get("RECON_PARALLEL_COUNTS") == "true"
+
+# well locations are snapped to a grid this size (in degrees) and only one
+# point per cell is kept for the hull. Set 0 to just drop exact duplicates.
+HULL_GRID_DEGREES = float(os.environ.get("HULL_GRID_DEGREES") or 0.01)
+
+HULL_FETCH_SIZE = 50000
+
 logger = Logger(__name__)
 
 
-def well_counts(repo_base) -> dict:
+def parallel_well_counts(conn: dict) -> dict:
+    """
+    Run each COUNTER_SQL statement on its own (cached) connection. The number
+    of simultaneous connections is capped per repo by the SQLAnywhere cache.
+    :param conn: SQLAnywhere connection params
+    :return: dict with each count
+    """
+
+    def tally(sql):
+        res = db_exec(dict(conn), sql)
+        return res[0]["tally"] or 0
+
+    with ThreadPoolExecutor(max_workers=SQLA_MAX_PER_REPO) as executor:
+        futures = {k: executor.submit(tally, sql) for k, sql in COUNTER_SQL.items()}
+        return {k: future.result() for k, future in futures.items()}
+
+
+def well_counts(repo_base, parallel: bool = RECON_PARALLEL_COUNTS) -> dict:
     """
     Run a bunch of SQL counts for wells having each data type. Note that this
     is well-centric. For example, it's wells with raster logs, not a count of
-    raster logs.
+    raster logs. By default all counts are collected in a single query.
     :param repo_base: A stub repo dict. We just use the fs_path
+    :param parallel: Run the separate counts over parallel connections instead
     :return: dict with each count, named after the keys below
     """
     logger.send_message(
@@ -80,34 +184,76 @@ def well_counts(repo_base) -> dict:
         workflow="recon",
     )
 
-    counter_sql = {
-        "well_count": WELLS,
-        "wells_with_completion": WELLS_WITH_COMPLETION,
-        "wells_with_core": WELLS_WITH_CORE,
-        "wells_with_dst": WELLS_WITH_DST,
-        "wells_with_formation": WELLS_WITH_FORMATION,
-        "wells_with_ip": WELLS_WITH_IP,
-        "wells_with_perforation": WELLS_WITH_PERFORATION,
-        "wells_with_production": WELLS_WITH_PRODUCTION,
-        "wells_with_raster_log": WELLS_WITH_RASTER_LOG,
-        "wells_with_survey": WELLS_WITH_SURVEY,
-        "wells_with_vector_log": WELLS_WITH_VECTOR_LOG,
-        "wells_with_zone": WELLS_WITH_ZONE,
+    if parallel:
+        return parallel_well_counts(repo_base["conn"])
+
+    res = db_exec(repo_base["conn"], WELL_COUNTS)
+
+    return {k: res[0].get(k) or 0 for k in COUNTER_SQL.keys()}
+
+
+def data_stamp(repo_base) -> Optional[dict]:
+    """
+    Row count and latest row_changed_date of each STAMP_TABLES table, to tell
+    whether the project's data changed since it was last seen. The hull
+    settings are included so that a cached outline is rebuilt when they
+    change.
+    :param repo_base: A stub repo dict. We just use the conn
+    :return: dict of stamps, or None if they can't be read (don't cache)
+    """
+    try:
+        res = db_exec(repo_base["conn"], DATA_STAMP)[0]
+    except Exception as error:
+        logger.warning(f"cannot stamp data @ {repo_base['fs_path']}: {error}")
+        return None
+    return {
+        **{k: v if isinstance(v, int) else str(v) for k, v in res.items()},
+        "grid": HULL_GRID_DEGREES,
+        "concavity": HULL_CONCAVITY,
     }
 
-    res = db_exec(repo_base["conn"], list(counter_sql.values()))
 
-    counts = {}
+def thin_points(points: np.ndarray, grid: float = HULL_GRID_DEGREES) -> np.ndarray:
+    """
+    Drop duplicate points and keep one point per grid cell. Kept points are
+    real well locations, so the hull can shift by at most one cell.
+    :param points: (n, 2) float64 array of lon, lat
+    :param grid: Grid cell size in degrees (0 keeps all distinct points)
+    :return: (m, 2) array with m <= n
+    """
+    points = points[np.isfinite(points).all(axis=1)]
+    if grid <= 0:
+        return np.unique(points, axis=0)
+    cells = np.floor(points / grid).astype(np.int64)
+    _, keep = np.unique(cells, axis=0, return_index=True)
+    return points[keep]
 
-    for i, k in enumerate(counter_sql.keys()):
-        counts[k] = res[i][0]["tally"] or 0
 
-    return counts
+def well_points(conn: dict) -> np.ndarray:
+    """
+    Stream well locations, thinning each block as it arrives so that only the
+    thinned points are held in memory.
+    :param conn: SQLAnywhere connection params
+    :return: (n, 2) float64 array of thinned lon, lat
+    """
+    blocks = [np.empty((0, 2), dtype=np.float64)]
+    for block in db_stream(conn, NOTNULL_LONLAT, HULL_FETCH_SIZE, columnar=True):
+        points = np.column_stack(
+            (
+                np.asarray(block["lon"], dtype=np.float64),
+                np.asarray(block["lat"], dtype=np.float64),
+            )
+        )
+        blocks.append(thin_points(points))
+    return thin_points(np.concatenate(blocks))
 
 
 def hull_outline(repo_base) -> dict:
     """
     https://concave-hull.readthedocs.io/en/latest/
+    Well locations are deduplicated and grid-thinned (see HULL_GRID_DEGREES)
+    before they go to concave_hull. Outlines are kept in the recon cache along
+    with the rest of the expensive metadata (see data_stamp).
     Note: we add a point to connect the last dot
     :param repo_base: A stub repo dict. We just use the fs_path
     :return: dict with hull (List of points)
@@ -115,22 +261,16 @@ def hull_outline(repo_base) -> dict:
     logger.send_message(
         directive="note",
         repo_id=repo_base["id"],
-        data={"note": f"building hull outline @ {repo_base["fs_path"]}"},
+        data={"note": f"building hull outline @ {repo_base['fs_path']}"},
         workflow="recon",
     )
 
-    res = db_exec(repo_base["conn"], NOTNULL_LONLAT)
-    points = [[r["lon"], r["lat"]] for r in res]
-
-    print("..............")
-    print(points)
-    print("..............")
+    points = well_points(repo_base["conn"])
 
     if len(points) < 3:
-        print(f"Too few valid Lon/Lat points for polygon: {repo_base["name"]}")
+        logger.warning(f"Too few valid Lon/Lat points for polygon: {repo_base['name']}")
         return {"outline": None}
 
-    hull = concave_hull(points, concavity=HULL_CONCAVITY)
-    first_point = hull[0]
-    hull.append(first_point)
+    hull = concave_hull(points, concavity=HULL_CONCAVITY).tolist()
+    hull.append(hull[0])
     return {"outline": hull}
@@ -1,139 +1,295 @@
-import glob
+import fnmatch
 import os
-import re
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from datetime import datetime
-from subprocess import run
+from dotenv import load_dotenv
 from common.util import normalize_path, hostname, hashify, SUITE
 from common.sqlanywhere import make_conn_params
 from common.logger import Logger
-from typing import List
+from typing import Dict, List
 
 # from common.debugger import debugger
 
-DUPATH = "bin/du64.exe"
+load_dotenv()
+
+# directory names (fnmatch patterns) never worth scanning for projects.
+# Add more as a comma-separated RECON_EXCLUDES in .env
+RECON_EXCLUDES = [
+    "$RECYCLE.BIN",
+    "System Volume Information",
+    ".*",
+] + [
+    x.strip() for x in (os.environ.get("RECON_EXCLUDES") or "").split(",") if x.strip()
+]
+
+# directory levels below the recon root to search. 0 means no limit.
+RECON_MAX_DEPTH = int(os.environ.get("RECON_MAX_DEPTH") or 0)
+
+# set RECON_FOLLOW_SYMLINKS=true in .env to also search symlinked directories
+# (each real directory is still only searched once)
+RECON_FOLLOW_SYMLINKS = os.environ.get("RECON_FOLLOW_SYMLINKS") == "true"
+
+# parallel directory listings; mostly waiting on network latency
+RECON_WALK_WORKERS = 16
 
 logger = Logger(__name__)
 
 
-def is_ggx_project(maybe: str) -> bool:
+def is_ggx_listing(entries: Dict[str, os.DirEntry]) -> bool:
     """
     A basic file/folder structure test to determine if a directory looks like a
-    geographix project. Assumes a healthy structure.
-    :param maybe: Any directory path
-    :return: True if input path looks like a repo directory
+    geographix project, using a directory listing we already have, so no extra
+    stat calls (DirEntry caches file type from the scan). Assumes a healthy
+    structure.
+    :param entries: DirEntry objects of one directory, keyed by lowercase name
+    :return: True if the listing looks like a repo directory
     """
-    gxdb = os.path.join(maybe, "gxdb.db")
-    gxdb_prod = os.path.join(maybe, "gxdb_production.db")
-    global_aoi = os.path.join(maybe, "Global")
-    return (
-        os.path.isfile(gxdb) and os.path.isfile(gxdb_prod) and os.path.isdir(global_aoi)
-    )
+    gxdb = entries.get("gxdb.db")
+    gxdb_prod = entries.get("gxdb_production.db")
+    global_aoi = entries.get("global")
+    try:
+        return (
+            gxdb is not None
+            and gxdb.is_file()
+            and gxdb_prod is not None
+            and gxdb_prod.is_file()
+            and global_aoi is not None
+            and global_aoi.is_dir()
+        )
+    except OSError:
+        return False
+
+
+def is_excluded(name: str, excludes: List[str]) -> bool:
+    return any(fnmatch.fnmatch(name.lower(), pat.lower()) for pat in excludes)
+
+
+def scan_dir(
+    dir_path: str,
+    depth: int,
+    excludes: List[str],
+    max_depth: int,
+    follow_symlinks: bool = False,
+):
+    """
+    List one directory. A GeoGraphix project is not descended into.
+    :param dir_path: Directory to list
+    :param depth: Depth below the recon root
+    :param excludes: fnmatch patterns of directory names to skip
+    :param max_depth: Don't list subdirectories deeper than this (0: no limit)
+    :param follow_symlinks: Include symlinked directories
+    :return: (project path or None, list of subdirectory paths to scan)
+    """
+    try:
+        with os.scandir(dir_path) as it:
+            entries = {entry.name.lower(): entry for entry in it}
+    except OSError as error:
+        logger.warning(f"cannot scan {dir_path}: {error}")
+        return None, []
+
+    if is_ggx_listing(entries):
+        return dir_path, []
+
+    if "gxdb.db" in entries:
+        logger.warning(f"found gxdb.db, but not a project?: {dir_path}")
+
+    subdirs = []
+    for entry in entries.values():
+        try:
+            if entry.is_dir(follow_symlinks=follow_symlinks) and not is_excluded(
+                entry.name, excludes
+            ):
+                subdirs.append(entry.path)
+        except OSError:
+            continue
+
+    if max_depth and depth >= max_depth:
+        if subdirs:
+            logger.warning(
+                f"not searching {len(subdirs)} folders below {dir_path} "
+                f"(RECON_MAX_DEPTH={max_depth})"
+            )
+        return None, []
+    return None, subdirs
+
+
+def walk_repos(
+    recon_root: str,
+    excludes: List[str] = RECON_EXCLUDES,
+    max_depth: int = RECON_MAX_DEPTH,
+    workers: int = RECON_WALK_WORKERS,
+    follow_symlinks: bool = RECON_FOLLOW_SYMLINKS,
+) -> List[str]:
+    """
+    Walk the filesystem with os.scandir to find GeoGraphix projects. Every
+    directory listing is its own task on a thread pool, so subtrees are scanned
+    in parallel (which matters on high-latency network shares), and descent
+    stops at each project found.
+    :param recon_root: Directory to search
+    :param excludes: fnmatch patterns of directory names to skip
+    :param max_depth: Maximum depth below recon_root to descend (0: no limit)
+    :param workers: Number of scanning threads
+    :param follow_symlinks: Also search symlinked directories. Off by default
+    (unlike the old recursive glob), since links can form cycles.
+    :return: sorted list of project directory paths
+    """
+    projects = []
+    # real paths already queued, so linked directories aren't searched twice
+    seen = {os.path.realpath(recon_root)} if follow_symlinks else None
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {
+            executor.submit(
+                scan_dir, recon_root, 0, excludes, max_depth, follow_symlinks
+            ): 0
+        }
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                depth = pending.pop(future)
+                project, subdirs = future.result()
+                if project:
+                    projects.append(project)
+                for subdir in subdirs:
+                    if seen is not None:
+                        real = os.path.realpath(subdir)
+                        if real in seen:
+                            continue
+                        seen.add(real)
+                    future = executor.submit(
+                        scan_dir,
+                        subdir,
+                        depth + 1,
+                        excludes,
+                        max_depth,
+                        follow_symlinks,
+                    )
+                    pending[future] = depth + 1
+    return sorted(projects)
 
 
 # @debugger
 def glob_repos(recon_root: str, ggx_host=f"{hostname().upper()}") -> List[dict]:
     """
-    Use glob matching to look for candidate geographix projects. This scheme is
-    faster (and simpler) than walking directory trees, but there may be some
-    native or multithreaded scheme that is better for huge filesystems.
-    :param recon_root:
-    :param ggx_host:
-    :return:
+    Look for geographix projects under recon_root (see walk_repos) and build a
+    stub repo dict for each.
+    :param recon_root: Directory to search
+    :param ggx_host: Ideally, this is the GeoGraphix project server's hostname
+    :return: list of stub repo dicts
     """
     logger.send_message(
         directive="note",
-        data={"note": f"recursive glob search: {recon_root}"},
+        data={"note": f"scanning for projects: {recon_root}"},
         workflow="recon",
     )
     repo_list = []
-    hits = glob.glob(os.path.join(recon_root, "**/gxdb.db"), recursive=True)
-    for hit in hits:
-        maybe = os.path.dirname(hit)
-        if is_ggx_project(maybe):
-            repo_list.append(
-                {
-                    "id": hashify(normalize_path(maybe)),
-                    "name": os.path.basename(maybe),
-                    "fs_path": normalize_path(maybe),
-                    "conn": make_conn_params(maybe, ggx_host),
-                    "conn_aux": {"ggx_host": ggx_host},
-                    "suite": SUITE,
-                }
-            )
-        else:
-            logger.warning(f"Glob match, but not a project?: {maybe}")
+    for maybe in walk_repos(recon_root):
+        repo_list.append(
+            {
+                "id": hashify(normalize_path(maybe)),
+                "name": os.path.basename(maybe),
+                "fs_path": normalize_path(maybe),
+                "conn": make_conn_params(maybe, ggx_host),
+                "conn_aux": {"ggx_host": ggx_host},
+                "suite": SUITE,
+            }
+        )
 
     return repo_list
 
 
-def dir_stats(repo_base) -> dict:
+# SQLAnywhere files get touched just by connecting, so they don't count as
+# project modifications
+GXDB_FILES = {"gxdb.db", "gxdb_production.db", "gxdb.log"}
+
+# parallel subtree walks per repo
+DIR_STATS_WORKERS = 8
+
+
+def new_stats() -> Dict[str, float]:
+    return {"files": 0, "directories": 0, "bytes": 0, "max_mtime": 0.0}
+
+
+def scan_stats(dir_path: str, stats: Dict[str, float]) -> List[str]:
     """
-    https://learn.microsoft.com/en-us/sysinternals/downloads/du
-    Run microsoft's du utility to collect directory size. Faster than python.
-    :param repo_base: A stub repo dict. We just use the fs_path
-    :return: dict of parsed stdout byte sizes
+    Tally one directory listing into stats. Symlinked directories are counted
+    but not followed.
+    :param dir_path: Directory to list
+    :param stats: Running totals (see new_stats), updated in place
+    :return: list of subdirectory paths
     """
-    logger.send_message(
-        directive="note",
-        repo_id=repo_base["id"],
-        data={"note": f"collecting dir stats @ {repo_base["fs_path"]}"},
-        workflow="recon",
-    )
+    subdirs = []
+    try:
+        with os.scandir(dir_path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stats["directories"] += 1
+                        subdirs.append(entry.path)
+                        continue
+                    if entry.is_symlink() and entry.is_dir():
+                        # like os.walk: listed as a directory, not followed
+                        stats["directories"] += 1
+                        continue
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                stats["files"] += 1
+                stats["bytes"] += st.st_size
+                if entry.name not in GXDB_FILES:
+                    stats["max_mtime"] = max(stats["max_mtime"], st.st_mtime)
+    except OSError as error:
+        logger.warning(f"cannot scan {dir_path}: {error}")
+    return subdirs
 
-    res = run(
-        [DUPATH, "-q", "-nobanner", repo_base["fs_path"]],
-        capture_output=True,
-        text=True,
-        check=False,
-    )
-    meta = {}
-    lines = res.stdout.splitlines()
-    for line in lines:
-        if line:
-            pair = line.split(":")
-            left = pair[0].strip()
-            right = pair[1].replace("bytes", "").replace(",", "").strip()
-            if left == "Size":
-                meta["bytes"] = int(right)
-            elif left != "Size on disk":
-                meta[left.lower()] = int(right)
-    return meta
-
-
-def repo_mod(repo_base) -> dict:
+
+def walk_stats(dir_path: str) -> Dict[str, float]:
+    """
+    Tally a whole directory tree (not counting dir_path itself)
+    :param dir_path: Top of the tree
+    :return: dict of files, directories, bytes and max_mtime
+    """
+    stats = new_stats()
+    stack = [dir_path]
+    while stack:
+        stack.extend(scan_stats(stack.pop(), stats))
+    return stats
+
+
+def dir_stats(repo_base) -> dict:
     """
-    Recursively traverse project folders to determine the most recently modified
-    project file date. We exclude SQLAnywhere, since the act of connecting to it
-    will update the mod dates. No, this is not performant.
-    TODO: optimize this
+    Collect file count, directory count, total bytes and the most recently
+    modified project file date in a single walk. The top-level subfolders are
+    walked in parallel. SQLAnywhere files are excluded from repo_mod, since the
+    act of connecting to the database will update their mod dates.
     :param repo_base: A stub repo dict. We just use the fs_path
-    :return: dict with repo_mode date
+    :return: dict with files, directories, bytes and repo_mod
     """
     logger.send_message(
         directive="note",
         repo_id=repo_base["id"],
-        data={"note": f"calculating repo mod @ {repo_base["fs_path"]}"},
+        data={"note": f"collecting dir stats @ {repo_base['fs_path']}"},
         workflow="recon",
     )
 
-    last_mod = datetime(1970, 1, 1)
-
-    def traverse(dir_path: str):
-        nonlocal last_mod
-        for f in os.listdir(dir_path):
-            full_path = os.path.join(dir_path, f)
-            try:
-                stat = os.stat(full_path)
-                if os.path.isdir(full_path):
-                    traverse(full_path)
-                else:
-                    gxdb_matcher = r"gxdb\.db$|gxdb_production\.db$|gxdb\.log$"
-                    if not re.match(gxdb_matcher, f):
-                        mod_time = datetime.fromtimestamp(stat.st_mtime)
-                        if mod_time > last_mod:
-                            last_mod = mod_time
-            except (OSError, ValueError):
-                continue
-
-    traverse(repo_base["fs_path"])
-    return {"repo_mod": last_mod.strftime("%Y-%m-%d %H:%M:%S")}
+    totals = new_stats()
+    subdirs = scan_stats(repo_base["fs_path"], totals)
+
+    if subdirs:
+        workers = min(DIR_STATS_WORKERS, len(subdirs))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for stats in executor.map(walk_stats, subdirs):
+                for key in ("files", "directories", "bytes"):
+                    totals[key] += stats[key]
+                totals["max_mtime"] = max(totals["max_mtime"], stats["max_mtime"])
+
+    if totals["max_mtime"]:
+        last_mod = datetime.fromtimestamp(totals["max_mtime"])
+    else:
+        last_mod = datetime(1970, 1, 1)
+
+    return {
+        "files": totals["files"],
+        "directories": totals["directories"],
+        "bytes": totals["bytes"],
+        "repo_mod": last_mod.strftime("%Y-%m-%d %H:%M:%S"),
+    }
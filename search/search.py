@@ -11,7 +11,7 @@ from dotenv import load_dotenv
 from psycopg2 import sql
 from common.logger import Logger
 from common.typeish import SearchTaskBody, ExportTaskBody
-from common.util import local_pg_params
+from common.pg_pool import pg_conn
 from contextlib import closing
 from typing import List, Dict
 
@@ -80,9 +80,13 @@ def make_asset_fts_queries(body: SearchTaskBody, conn: psycopg2.extensions.conne
 
 
 def search_local_pg(supabase, body: SearchTaskBody) -> str:
-    params = local_pg_params()
-    conn: psycopg2.extensions.connection = psycopg2.connect(**params)
+    with pg_conn() as conn:
+        return search_with_conn(supabase, body, conn)
 
+
+def search_with_conn(
+    supabase, body: SearchTaskBody, conn: psycopg2.extensions.connection
+) -> str:
     fts_queries: List[Dict[str, str]] = make_asset_fts_queries(body, conn)
 
     limit = 100
@@ -193,8 +197,7 @@ def query_to_file(task: ExportTaskBody):
     output_path = os.path.join(os.environ.get("EXPORT_DIR"), output_file)
 
     try:
-        params = local_pg_params()
-        with closing(psycopg2.connect(**params)) as conn:
+        with pg_conn() as conn:
             with closing(conn.cursor(cursor_factory=psycopg2.extras.DictCursor)) as cur:
                 cur.execute(task.sql)
 